@@ -0,0 +1,114 @@
+#
+# Copyright 2025 Michael Shafae
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+""" Check the formatting of many files with black quickly. One black.Mode is
+    shared by every file, the files are formatted in a pool of worker
+    processes, and each file's result, including its diff, is cached by its
+    path and contents, black's version and the mode. An unchanged tree is
+    checked without formatting anything. """
+
+import concurrent.futures
+import logging
+import tokenize
+
+import black
+
+from resultcache import ResultCache, hash_bytes
+from sourceindex import get_source
+
+
+def make_mode(line_length=80):
+    """Return the black.Mode the format check uses."""
+    return black.Mode(
+        target_versions=set(),
+        line_length=line_length,
+        is_pyi=False,
+        is_ipynb=False,
+        string_normalization=False,
+        magic_trailing_comma=False,
+    )
+
+
+def diff_file(file, mode, src_contents=None):
+    """Return the lines of the diff black would make to the file, an
+    empty list if it is formatted, or None if black can't parse it. Pass
+    src_contents if the file has already been read."""
+    if src_contents is None:
+        # tokenize.open decodes the way Python does, whatever black's
+        # version.
+        with tokenize.open(file) as file_handle:
+            src_contents = file_handle.read()
+    try:
+        dst_contents = black.format_file_contents(
+            src_contents, fast=False, mode=mode
+        )
+    except black.NothingChanged:
+        return []
+    except Exception as exception:  # black raises many kinds of errors
+        logging.error('%s: black cannot format the file. %s', file, exception)
+        return None
+    # No timestamps in the diff so it can be cached.
+    diff_contents = black.diff(src_contents, dst_contents, file, file)
+    return diff_contents.split('\n')
+
+
+def check_files(files, line_length=80, workers=None, use_cache=True):
+    """Check every file's format using up to workers processes and return
+    a dictionary mapping each file to its diff like
+    pysrcutilities.pyformat_check: an empty list when it is formatted and
+    None when black can't parse it."""
+    mode = make_mode(line_length)
+    cache = None
+    if use_cache:
+        cache = ResultCache('black', hash_bytes(black.__version__, repr(mode)))
+    diffs = {}
+    to_check = {}
+    for file in files:
+        # The path is part of the key since the diff names it.
+        file_hash = hash_bytes(file, get_source(file).content_hash)
+        cached = cache.get(file_hash) if cache else None
+        if cached is None:
+            to_check[file] = file_hash
+        else:
+            logging.debug('%s: using the cached format result.', file)
+            diffs[file] = cached
+    if to_check:
+        logging.debug('Checking the format of %d files.', len(to_check))
+        with concurrent.futures.ProcessPoolExecutor(
+            max_workers=workers
+        ) as executor:
+            checked = executor.map(
+                diff_file,
+                to_check,
+                [mode] * len(to_check),
+                [get_source(file).text for file in to_check],
+            )
+            for (file, diff) in zip(to_check, checked):
+                diffs[file] = diff
+                if cache and diff is not None:
+                    cache.put(to_check[file], diff)
+    if cache:
+        cache.save()
+    return {file: diffs[file] for file in files}
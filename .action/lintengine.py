@@ -0,0 +1,134 @@
+#
+# Copyright 2025 Michael Shafae
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+""" Run pylint over many files quickly. Files are linted in-process by
+    pylint's own API in a pool of worker processes, instead of starting a
+    pylint process per file and reading its score back out of the text it
+    prints. Results are cached by the contents of each file, the pylint
+    configuration and the pylint version, so only files that changed since
+    the last run are linted again. """
+
+import concurrent.futures
+import io
+import logging
+import os
+
+import pylint
+from pylint.config import find_default_config_files
+from pylint.lint import Run
+from pylint.reporters.text import TextReporter
+
+from resultcache import ResultCache, hash_bytes
+from sourceindex import get_source
+
+PYLINT_BEST_SCORE = 10.0
+
+# Options added to every run; no-member is noisy with pygame.
+PYLINT_ARGS = ('-d', 'no-member')
+
+
+def lint_file_in_process(file, rcfile=None):
+    """Lint one file with pylint in this process. Return the score and the
+    lines pylint reported."""
+    arguments = list(PYLINT_ARGS)
+    if rcfile:
+        arguments.append(f'--rcfile={rcfile}')
+    output = io.StringIO()
+    run = Run(arguments + [file], reporter=TextReporter(output), exit=False)
+    lines = [line for line in output.getvalue().split('\n') if line.strip()]
+    return (run.linter.stats.global_note, lines)
+
+
+def config_salt(rcfile=None):
+    """Return a string that changes whenever the lint results could change
+    for reasons other than the file itself: the pylint version, the options
+    and the contents of the configuration file."""
+    if not rcfile:
+        rcfile = next(iter(find_default_config_files()), None)
+    config = b''
+    if rcfile:
+        with open(rcfile, 'rb') as file_handle:
+            config = file_handle.read()
+    return hash_bytes(pylint.__version__, ' '.join(PYLINT_ARGS), config)
+
+
+def _passes(score, epsilon):
+    """Return True if the score is within epsilon of a perfect score."""
+    return PYLINT_BEST_SCORE - epsilon <= score
+
+
+def lint_files(files, epsilon=1.0, rcfile=None, workers=None, use_cache=True):
+    """Lint every file, using up to workers processes, and return a
+    dictionary mapping each file to (passed, warnings) like
+    pysrcutilities.pylint_check. Files whose contents were linted before
+    at the same path with the same configuration aren't linted again."""
+    cache = ResultCache('pylint', config_salt(rcfile)) if use_cache else None
+    report = {}
+    scores = {}
+    to_lint = {}
+    for file in files:
+        if os.stat(file).st_size == 0:
+            logging.warning('File %s is empty.', file)
+            report[file] = (False, [])
+            continue
+        # The path is part of the key since pylint's messages name it.
+        file_hash = hash_bytes(file, get_source(file).content_hash)
+        cached = cache.get(file_hash) if cache else None
+        if cached is None:
+            to_lint[file] = file_hash
+        else:
+            logging.debug('%s: using the cached lint result.', file)
+            scores[file] = tuple(cached)
+    if to_lint:
+        logging.debug('Linting %d files.', len(to_lint))
+        with concurrent.futures.ProcessPoolExecutor(
+            max_workers=workers
+        ) as executor:
+            lints = executor.map(
+                lint_file_in_process,
+                to_lint,
+                [rcfile] * len(to_lint),
+            )
+            for (file, (score, lines)) in zip(to_lint, lints):
+                scores[file] = (score, lines)
+                if cache:
+                    cache.put(to_lint[file], [score, lines])
+    if cache:
+        cache.save()
+    for (file, (score, lines)) in scores.items():
+        passed = _passes(score, epsilon)
+        if passed:
+            logging.info(
+                '%s passes linting. %.2f/%.2f', file, score, PYLINT_BEST_SCORE
+            )
+        else:
+            logging.error(
+                '%s does not pass linting. %.2f/%.2f',
+                file,
+                score,
+                PYLINT_BEST_SCORE,
+            )
+        report[file] = (passed, lines)
+    return report
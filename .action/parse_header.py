@@ -56,26 +56,48 @@ def null_dict_header():
     }
     return result_dict
 
+# The line boundaries str.splitlines splits on.
+LINE_BREAK_REGEX = re.compile('\r\n|[\n\r\v\f\x1c\x1d\x1e\x85\u2028\u2029]')
+
+
+def iter_lines(contents):
+    """Yield the lines of contents, like contents.splitlines() but one at
+    a time, so a caller that stops early doesn't split the whole string."""
+    start = 0
+    for line_break in LINE_BREAK_REGEX.finditer(contents):
+        yield contents[start:line_break.start()]
+        start = line_break.end()
+    if start < len(contents):
+        yield contents[start:]
+
+
 def dict_header(contents, silent=False, comments_startwith='//'):
     """Given a single string, parse the header and return the result
     as a dictionary with the keys class, email, github, asgt, comment.
     On parse error, log a descriptive message and return an empty dictionary."""
+    return dict_header_from_lines(iter_lines(contents), silent, comments_startwith)
+
+
+def dict_header_from_lines(lines, silent=False, comments_startwith='//'):
+    """Parse the header at the start of lines, an iterator of lines without
+    line endings such as sourceindex.SourceFile.lines, and return the
+    dictionary described in dict_header. Lines after the header are never
+    taken from the iterator."""
 
     logger = setup_logger()
     
     FAILURE = dict()
 
-    lines = contents.splitlines()
+    first_line = next(lines, None)
 
     # reject: empty source file
-    if len(lines) == 0:
+    if first_line is None:
         if not silent:
             logger.warning('header missing because source file is empty')
         return FAILURE
 
     # reject: whitespace on first line
-    assert(len(lines) > 0)
-    if len(lines[0]) == 0 or lines[0].isspace():
+    if len(first_line) == 0 or first_line.isspace():
         if not silent:
             logger.warning(f'line 1: expected a {comments_startwith} comment holding a header, but found whitespace instead')
         return FAILURE
@@ -85,7 +107,7 @@ def dict_header(contents, silent=False, comments_startwith='//'):
     # At this point we are permissive about leading and trailing whitespace, so
     # we can give constructive feedback about more important issues.
     # The strict whitespace check is last, below.
-    comment_lines = list(itertools.takewhile(lambda line: line.lstrip().startswith(comments_startwith), lines))
+    comment_lines = list(itertools.takewhile(lambda line: line.lstrip().startswith(comments_startwith), itertools.chain([first_line], lines)))
 
     if len(comment_lines) > 0 and comments_startwith == '#' and comment_lines[0].startswith('#!'):
         # check for a shebang. If there, discard and continue
@@ -94,7 +116,7 @@ def dict_header(contents, silent=False, comments_startwith='//'):
     # reject: no comments (meaning the first line is neither whitespace nor a comment)
     if len(comment_lines) == 0:
         if not silent:
-            logger.warning(f'line 1: expected a {comments_startwith} comment holding a header, but instead found: {lines[0]}')
+            logger.warning(f'line 1: expected a {comments_startwith} comment holding a header, but instead found: {first_line}')
         return FAILURE
 
     # strip whitespace for parsing purposes
@@ -24,14 +24,15 @@
 # ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
 # POSSIBILITY OF SUCH DAMAGE.
 #
-""" Check the given files to see if they conform to the Google C++
-    Programming style using clang-format. """
+""" Check the given files, and the .py files in the given directories, to
+    see if they conform to the Python style using black. """
 
 import sys
 import logging
 import os.path
 from logger import setup_logger
-from pysrcutilities import pyformat_check, glob_py_src_files
+from formatengine import check_files
+from pysrcutilities import scan_py_src_files
 
 
 def main():
@@ -43,20 +44,20 @@ def main():
     if len(sys.argv) < 2:
         logger.warning('Only %s arguments provided.', len(sys.argv))
         logger.warning('Provide a target directory to search for .py files.')
-    # src_files = []
-    # for in_directory in sys.argv[1:]:
-    #     src_files = src_files + glob_py_src_files(in_directory)
-    # if len(src_files):
-    #     logger.debug('Source files to be checked are %s', ', '.join(src_files))
-    # else:
-    #     logger.warning('No source files in the repository.')
-    #     status = 1
-    for in_file in sys.argv[1:]:
+    src_files = []
+    for in_path in sys.argv[1:]:
+        if os.path.isdir(in_path):
+            src_files.extend(scan_py_src_files(in_path))
+        elif not os.path.exists(in_path):
+            logger.debug('File %s does not exist. Continuing.', in_path)
+        else:
+            src_files.append(in_path)
+    if src_files:
+        logger.debug('Source files to be checked are %s', ', '.join(src_files))
+    diffs = check_files(src_files)
+    for in_file in src_files:
         logger.info('Checking format for file: %s', in_file)
-        if not os.path.exists(in_file):
-            logger.debug('File %s does not exist. Continuing.', in_file)
-            continue
-        diff = pyformat_check(in_file)
+        diff = diffs[in_file]
         # print(f'"{diff}"')
         if diff == None:
             logger.warning("Error: Formatting needs improvement.")
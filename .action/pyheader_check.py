@@ -42,7 +42,8 @@
 import sys
 import logging
 from logger import setup_logger
-from parse_header import dict_header
+from parse_header import dict_header_from_lines
+from sourceindex import get_source
 
 def header_check(file):
     """ Check file's header if it conforms to the standard given \
@@ -64,9 +65,9 @@ def header_check(file):
 
     # return true if header is good
     keys = ['name', 'class', 'email', 'github', 'asgt', 'partners', 'comment']
-    with open(file) as file_handle:
-        contents = file_handle.read()
-    header = dict_header(contents, silent=True, comments_startwith='#')
+    header = dict_header_from_lines(
+        get_source(file).lines(), silent=True, comments_startwith='#'
+    )
     status = True
     if header:
         for k in keys:
@@ -98,9 +99,9 @@ def get_header_and_check(file, comments_startwith='//'):
 
     # return true if header is good
     keys = ['name', 'class', 'email', 'github', 'asgt', 'partners', 'comment']
-    with open(file) as file_handle:
-        contents = file_handle.read()
-    header = dict_header(contents, comments_startwith=comments_startwith)
+    header = dict_header_from_lines(
+        get_source(file).lines(), comments_startwith=comments_startwith
+    )
     status = True
     if header:
         for k in keys:
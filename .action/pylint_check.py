@@ -24,14 +24,15 @@
 # ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
 # POSSIBILITY OF SUCH DAMAGE.
 #
-""" Check the given files to see if they conform to good programming
-    practices using clang-tidy. """
+""" Check the given files, and the .py files in the given directories, to
+    see if they conform to good programming practices using pylint. """
 
 import sys
 import logging
 import os.path
 from logger import setup_logger
-from pysrcutilities import pylint_check, glob_py_src_files
+from lintengine import lint_files
+from pysrcutilities import scan_py_src_files
 
 
 def main():
@@ -42,20 +43,20 @@ def main():
     if len(sys.argv) < 2:
         logger.warning('Only %s arguments provided.', len(sys.argv))
         logger.warning('Provide a target directory to search for .py files.')
-    # src_files = []
-    # for in_directory in sys.argv[1:]:
-    #     src_files = src_files + glob_py_src_files(in_directory)
-    # if len(src_files):
-    #     logger.debug('Source files to be checked are %s', ', '.join(src_files))
-    # else:
-    #     logger.warning('No source files in the repository.')
-    #     status = 1
-    for in_file in sys.argv[1:]:
+    src_files = []
+    for in_path in sys.argv[1:]:
+        if os.path.isdir(in_path):
+            src_files.extend(scan_py_src_files(in_path))
+        elif not os.path.exists(in_path):
+            logger.debug('File %s does not exist. Continuing.', in_path)
+        else:
+            src_files.append(in_path)
+    if src_files:
+        logger.debug('Source files to be checked are %s', ', '.join(src_files))
+    results = lint_files(src_files)
+    for in_file in src_files:
         logger.info('Linting file: %s', in_file)
-        if not os.path.exists(in_file):
-            logger.debug('File %s does not exist. Continuing.', in_file)
-            continue
-        lint_has_passed, lint_warnings = pylint_check(in_file)
+        lint_has_passed, lint_warnings = results[in_file]
         if not lint_has_passed:
             logger.error('Linter found improvements.')
             logger.warning('\n'.join(lint_warnings))
@@ -27,6 +27,8 @@
     assignments. """
 
 import glob
+import json
+import os
 import os.path
 import logging
 import re
@@ -37,85 +39,20 @@ def remove_python_comments(file):
     """Removing comments from Python code. Inspiration from
     https://stackoverflow.com/questions/59270042/efficent-way-to-remove-docstring-with-regex
     see Alexandr Shurigin's answer"""
-    import ast
-    import astor
-
-    no_comments = None
+    from sourceindex import get_source
 
     try:
-        with open(file) as file_handle:
-            contents = file_handle.read()
-    except FileNotFoundError as exception:
+        return get_source(file).stripped_source
+    except FileNotFoundError:
         logging.error('Cannot remove comments. No such file. %s', file)
-
-    parsed = ast.parse(contents)
-
-    for node in ast.walk(parsed):
-        # let's work only on functions & classes definitions
-        if not isinstance(
-            node, (ast.FunctionDef, ast.ClassDef, ast.AsyncFunctionDef)
-        ):
-            continue
-        if not len(node.body):
-            continue
-        if not isinstance(node.body[0], ast.Expr):
-            continue
-        if not hasattr(node.body[0], 'value') or not isinstance(
-            node.body[0].value, ast.Str
-        ):
-            continue
-        # Uncomment lines below if you want print what and where we are removing
-        # print(node)
-        # print(node.body[0].value.s)
-        node.body = node.body[1:]
-
-    # print('***** Processed source code output ******\n=========================================')
-    # print(astor.to_source(parsed))
-    no_comments = astor.to_source(parsed)
-    return no_comments
+        return None
 
 def pylint_check(file, epsilon=1.0):
-    """Use pylint to lint the input file."""
-    from pylint import epylint as lint
+    """Use pylint to lint the input file. See lintengine.lint_files to lint
+    many files at once."""
+    from lintengine import lint_files
 
-    linting_passed = False
-    linter_warnings = []
-    if os.stat(file).st_size == 0:
-        logging.warning('File %s is empty.', file)
-    else:
-        (pylint_stdout, pylint_stderr) = lint.py_run(
-            file + ' -d no-member', return_std=True
-        )
-        stdout = '\n'.join(pylint_stdout.readlines())
-        stderr = '\n'.join(pylint_stderr.readlines())
-        # print(s)
-        pattern = r"been rated at (-?\d?\d?\d?\d.\d\d)/10"
-        search_results = re.search(pattern, stdout)
-        if search_results:
-            match = search_results.group(1)
-            # print('\t{}: {}'.format(file, match))
-        else:
-            logging.error('%s: no match\n%s\n%s', file, stdout, stderr)
-            match = '-999'
-        pylint_best_score = 10.0
-        score = float(match)
-        if pylint_best_score - epsilon > score:
-            logging.error(
-                '%s does not pass linting. %.2f/%.2f',
-                file,
-                score,
-                pylint_best_score,
-            )
-        else:
-            logging.info(
-                '%s passes linting. %.2f/%.2f', file, score, pylint_best_score
-            )
-            linting_passed = True
-        linter_warnings = stdout.split('\n')
-        linter_warnings = [
-            line for line in linter_warnings if line != '' and line != ' '
-        ]
-    return (linting_passed, linter_warnings)
+    return lint_files([file], epsilon=epsilon, workers=1)[file]
 
 
 def pyformat_file_in_place(
@@ -174,112 +111,199 @@ def pyformat_file_in_place(
 
 
 def pyformat_check(file):
-    """Use black to check the style of the input file."""
-    diff_contents = None
-    # black.freeze_support()
-    # black.patch_click()
-    # black.main()
-    check = True
-    diff = True
-    color = False
-    verbose = False
-    line_length = 80
-    fast = False
-    write_back = False
-    quiet = True
-    write_back = black.WriteBack.from_configuration(
-        check=check, diff=diff, color=color
-    )
-    versions = set()
-    mode = black.Mode(
-        target_versions=versions,
-        line_length=line_length,
-        is_pyi=False,
-        is_ipynb=False,
-        string_normalization=False,
-        magic_trailing_comma=False,
-        experimental_string_processing=False,
-    )
-    report = black.Report(check=check, diff=diff, quiet=quiet, verbose=verbose)
-    sources = [black.Path(file)]
-    # You can process multiple files very fast, a single file is all we need.
-    if len(sources) == 1:
-        # black.reformat_one(
-        #    src=sources.pop(),
-        #    fast=fast,
-        #    write_back=write_back,
-        #    mode=mode,
-        #    report=report,
-        # )
-        src = sources.pop()
-        try:
-            changed = black.Changed.NO
-            cache: Cache = {}
-            if write_back not in (
-                black.WriteBack.DIFF,
-                black.WriteBack.COLOR_DIFF,
-            ):
-                cache = black.read_cache(mode)
-                res_src = src.resolve()
-                res_src_s = str(res_src)
-                if res_src_s in cache and cache[
-                    res_src_s
-                ] == black.get_cache_info(res_src):
-                    changed = black.Changed.CACHED
-            if changed is not black.Changed.CACHED:
-                (status, diff_contents) = pyformat_file_in_place(
-                    src, fast=fast, write_back=write_back, mode=mode
-                )
-                if status:
-                    changed = black.Changed.YES
-            if (
-                write_back is black.WriteBack.YES
-                and changed is not black.Changed.CACHED
-            ) or (
-                write_back is black.WriteBack.CHECK
-                and changed is black.Changed.NO
-            ):
-                black.write_cache(cache, [src], mode)
-            report.done(src, changed)
-        except Exception as exc:
-            if report.verbose:
-                black.traceback.print_exc()
-            report.failed(src, str(exc))
-
-    else:
-        workers = 2
-        black.reformat_many(
-            sources=sources,
-            fast=fast,
-            write_back=write_back,
-            mode=mode,
-            report=report,
-            workers=workers,
-        )
+    """Use black to check the style of the input file. See
+    formatengine.check_files to check many files at once."""
+    from formatengine import check_files
 
-    # print(diff_contents)
-    # print(report.__dict__)
-    # Pycodestyle
-    # see https://pycodestyle.pycqa.org/en/latest/advanced.html
-    # class TestCodeFormat(unittest.TestCase):
-    #
-    #    def test_conformance(self):
-    #        """Test that we conform to PEP-8."""
-    #        style = pycodestyle.StyleGuide(quiet=True)
-    #        result = style.check_files(['file1.py', 'file2.py'])
-    #        self.assertEqual(result.total_errors, 0,
-    #                         "Found code style errors (and warnings).")
-    # or
-    # fchecker = pycodestyle.Checker('testsuite/E27.py', show_source=True)
-    # file_errors = fchecker.check_all()
-    if diff_contents:
-        diff_contents = diff_contents.split('\n')
-    return diff_contents
+    return check_files([file], workers=1)[file]
 
 def glob_py_src_files(target_dir='.'):
     """Recurse through the target_dir and find all the .py files."""
     return glob.glob(os.path.join(target_dir, '**/*.py'), recursive=True)
 
+# Directories and files never worth checking, in .gitignore syntax. Hidden
+# directories, such as .git and .venv, are skipped like glob skips them.
+DEFAULT_EXCLUDES = (
+    '.*/',
+    '__pycache__/',
+    'venv/',
+    'node_modules/',
+    '*.egg-info/',
+    'build/',
+    'dist/',
+    'data/',
+    'assets/',
+)
+
+
+def _ignore_pattern_regex(pattern):
+    """Translate a .gitignore glob, without its ! or trailing /, into a
+    regex. A pattern with a / in it is matched against the path relative to
+    the .gitignore's directory, otherwise against the name alone."""
+    regex = ''
+    index = 0
+    while index < len(pattern):
+        if pattern.startswith('**/', index):
+            regex += '(?:.*/)?'
+            index += 3
+        elif pattern.startswith('**', index):
+            regex += '.*'
+            index += 2
+        elif pattern[index] == '*':
+            regex += '[^/]*'
+            index += 1
+        elif pattern[index] == '?':
+            regex += '[^/]'
+            index += 1
+        else:
+            regex += re.escape(pattern[index])
+            index += 1
+    return re.compile(regex + r'\Z')
+
+
+def parse_ignore_patterns(lines, base=''):
+    """Return the rules in lines, in .gitignore syntax, as a list of
+    (regex, negated, directory only, anchored, base) tuples. The base is the
+    directory, relative to the scan's root, the rules came from."""
+    rules = []
+    for line in lines:
+        line = line.rstrip('\n').rstrip()
+        if not line or line.startswith('#'):
+            continue
+        negated = line.startswith('!')
+        if negated:
+            line = line[1:]
+        directory_only = line.endswith('/')
+        line = line.rstrip('/')
+        anchored = '/' in line
+        line = line.lstrip('/')
+        rules.append(
+            (_ignore_pattern_regex(line), negated, directory_only, anchored, base)
+        )
+    return rules
+
+
+def is_ignored(rules, relative_path, is_directory):
+    """Return True if relative_path, relative to the scan's root, is
+    excluded by rules. Like git, the last rule that matches wins."""
+    ignored = False
+    name = relative_path.rsplit('/', 1)[-1]
+    for (regex, negated, directory_only, anchored, base) in rules:
+        if directory_only and not is_directory:
+            continue
+        if anchored:
+            if base:
+                if not relative_path.startswith(base + '/'):
+                    continue
+                path = relative_path[len(base) + 1 :]
+            else:
+                path = relative_path
+            if regex.match(path):
+                ignored = not negated
+        elif regex.match(name):
+            ignored = not negated
+    return ignored
+
+
+def _read_gitignore(directory, relative_directory):
+    """Return the rules in directory's .gitignore, or none if it has
+    none."""
+    try:
+        with open(
+            os.path.join(directory, '.gitignore'), encoding='utf-8'
+        ) as file_handle:
+            return parse_ignore_patterns(file_handle, relative_directory)
+    except OSError:
+        return []
+
+
+def _list_directory(directory):
+    """Return the .py files, the subdirectories and whether there is a
+    .gitignore in directory, in one os.scandir pass."""
+    py_files = []
+    subdirectories = []
+    has_gitignore = False
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                subdirectories.append(entry.name)
+            elif entry.name.endswith('.py'):
+                py_files.append(entry.name)
+            elif entry.name == '.gitignore':
+                has_gitignore = True
+    return [sorted(py_files), sorted(subdirectories), has_gitignore]
+
+
+def scan_py_src_files(
+    target_dir='.', excludes=DEFAULT_EXCLUDES, use_gitignore=True, use_cache=True
+):
+    """Yield the .py files under target_dir, skipping anything excluded by
+    excludes or, if use_gitignore, by the .gitignore files found along the
+    way. Excluded directories are never entered. Each directory's listing
+    is cached with its modification time, which changes whenever an entry
+    is added, removed or renamed, so an unchanged directory isn't listed
+    again. Files are yielded as they are found so checking can start
+    before the scan is done."""
+    from resultcache import default_cache_dir, hash_bytes
+
+    root = os.path.abspath(target_dir)
+    cache_path = os.path.join(
+        default_cache_dir(), f'scan-{hash_bytes(root)[:16]}.json'
+    )
+    listings = {}
+    if use_cache:
+        try:
+            with open(cache_path, encoding='utf-8') as file_handle:
+                listings = json.load(file_handle)
+        except (OSError, ValueError):
+            listings = {}
+    new_listings = {}
+    base_rules = parse_ignore_patterns(excludes)
+    # Directories still to scan, as (relative path, rules in effect).
+    pending = [('', base_rules)]
+    while pending:
+        (relative_directory, rules) = pending.pop()
+        directory = os.path.join(root, relative_directory)
+        try:
+            mtime = os.stat(directory).st_mtime_ns
+        except OSError:
+            continue
+        cached = listings.get(relative_directory)
+        if cached and cached[0] == mtime:
+            listing = cached[1]
+        else:
+            try:
+                listing = _list_directory(directory)
+            except OSError as exception:
+                logging.warning('Cannot scan %s: %s', directory, exception)
+                continue
+        new_listings[relative_directory] = [mtime, listing]
+        (py_files, subdirectories, has_gitignore) = listing
+        if use_gitignore and has_gitignore:
+            rules = rules + _read_gitignore(directory, relative_directory)
+        prefix = relative_directory + '/' if relative_directory else ''
+        for name in py_files:
+            if not is_ignored(rules, prefix + name, False):
+                yield os.path.join(target_dir, prefix + name)
+        for name in reversed(subdirectories):
+            if not is_ignored(rules, prefix + name, True):
+                pending.append((prefix + name, rules))
+    if use_cache:
+        # The cache only saves time, so failing to write it is not an error.
+        temporary_path = f'{cache_path}.{os.getpid()}.tmp'
+        try:
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            with open(temporary_path, 'w', encoding='utf-8') as file_handle:
+                json.dump(new_listings, file_handle)
+            os.replace(temporary_path, cache_path)
+        except OSError as exception:
+            logging.warning('Cannot write cache %s: %s', cache_path, exception)
+            try:
+                os.remove(temporary_path)
+            except OSError:
+                pass
+
+
 def has_pymain_condition(file):
     """Check if the given file has the __name__ == __main__"""
     print('has_pymain_condition not implemented.')
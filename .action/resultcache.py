@@ -0,0 +1,128 @@
+#
+# Copyright 2025 Michael Shafae
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+""" A cache of check results on disk, so a checker only has to look at the
+    files that changed since it last ran. Results are kept in a JSON file
+    under a key made from a hash of each file's contents and of everything
+    else that affects the result, such as the tool's version and its
+    configuration. """
+
+import hashlib
+import json
+import logging
+import os
+import os.path
+
+
+def default_cache_dir():
+    """Return the directory where the check caches are kept. Set
+    ACTION_CACHE_DIR to keep them somewhere else, for example a directory
+    a CI job saves between runs."""
+    cache_dir = os.environ.get('ACTION_CACHE_DIR')
+    if not cache_dir:
+        cache_home = os.environ.get('XDG_CACHE_HOME') or os.path.join(
+            os.path.expanduser('~'), '.cache'
+        )
+        cache_dir = os.path.join(cache_home, 'mshafae-action')
+    return cache_dir
+
+
+def hash_bytes(*parts):
+    """Return the hex SHA-256 digest of the given bytes or strings."""
+    digest = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, str):
+            part = part.encode('utf-8')
+        digest.update(part)
+        # Keep ('ab', 'c') and ('a', 'bc') apart.
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """ Check results by file, valid as long as the file's contents and
+    the cache's salt are unchanged. """
+
+    def __init__(self, name, salt, cache_dir=None, max_entries=10000):
+        """Open the cache called name. The salt is a string describing
+        everything besides the file that affects a result; results saved
+        with a different salt are ignored. Only the max_entries most
+        recently used results are saved."""
+        self._path = os.path.join(cache_dir or default_cache_dir(), name + '.json')
+        self._salt = salt
+        self._max_entries = max_entries
+        self._entries = {}
+        self._dirty = False
+        try:
+            with open(self._path, encoding='utf-8') as file_handle:
+                self._entries = json.load(file_handle)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as exception:
+            logging.debug('Ignoring unreadable cache %s: %s', self._path, exception)
+
+    def key(self, content_hash):
+        """Return the cache key for a file whose contents hash to
+        content_hash."""
+        return hash_bytes(content_hash, self._salt)
+
+    def get(self, content_hash):
+        """Return the cached result for the contents, or None."""
+        key = self.key(content_hash)
+        result = self._entries.pop(key, None)
+        if result is not None:
+            # Move it to the end, where the most recently used entries are.
+            self._entries[key] = result
+            self._dirty = True
+        return result
+
+    def put(self, content_hash, result):
+        """Remember result, which must be JSON serializable, for the
+        contents."""
+        self._entries[self.key(content_hash)] = result
+        self._dirty = True
+
+    def save(self):
+        """Write the cache back to disk if anything was added. A cache that
+        can't be written is only a missed speedup, so failing to write it
+        logs a warning instead of failing the check."""
+        if not self._dirty:
+            return
+        for key in list(self._entries)[: -self._max_entries]:
+            del self._entries[key]
+        temporary_path = f'{self._path}.{os.getpid()}.tmp'
+        try:
+            os.makedirs(os.path.dirname(self._path), exist_ok=True)
+            with open(temporary_path, 'w', encoding='utf-8') as file_handle:
+                json.dump(self._entries, file_handle)
+            os.replace(temporary_path, self._path)
+        except OSError as exception:
+            logging.warning('Cannot write cache %s: %s', self._path, exception)
+            try:
+                os.remove(temporary_path)
+            except OSError:
+                pass
+            return
+        self._dirty = False
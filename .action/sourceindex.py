@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+#
+# Copyright 2025 Michael Shafae
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+""" A shared index of Python source files for the checkers. Each file is
+    read once, memory-mapped when it is large, and everything the header,
+    lint and format checks need from it is worked out at most once and kept:
+    its text, the hash of its contents, its lines read lazily from the start
+    for the header check, its AST, its tokens and its source with the
+    docstrings removed.
+
+    Run it as a script to time reading a tree with the index against
+    reading each file once per check. """
+
+import ast
+import functools
+import io
+import mmap
+import os
+import os.path
+import shutil
+import sys
+import tempfile
+import time
+import tokenize
+
+from parse_header import dict_header, dict_header_from_lines
+from resultcache import hash_bytes
+
+# Files at least this many bytes are memory-mapped rather than read.
+MMAP_THRESHOLD = 1024 * 1024
+
+
+def _strip_docstrings(tree):
+    """Remove the docstrings of the functions and classes in tree. Return
+    a list of (node, original body) to put them back."""
+    stripped = []
+    for node in ast.walk(tree):
+        if not isinstance(
+            node, (ast.FunctionDef, ast.ClassDef, ast.AsyncFunctionDef)
+        ):
+            continue
+        if (
+            node.body
+            and isinstance(node.body[0], ast.Expr)
+            and isinstance(node.body[0].value, ast.Constant)
+            and isinstance(node.body[0].value.value, str)
+        ):
+            stripped.append((node, node.body))
+            node.body = node.body[1:]
+    return stripped
+
+
+class SourceFile:
+    """ One Python source file, read once and analyzed lazily. """
+
+    def __init__(self, path):
+        """Index the file at path; nothing is read until it is needed."""
+        self.path = path
+
+    @functools.cached_property
+    def data(self):
+        """Return the file's bytes, memory-mapped if the file is large."""
+        with open(self.path, 'rb') as file_handle:
+            size = os.fstat(file_handle.fileno()).st_size
+            if size >= MMAP_THRESHOLD:
+                return mmap.mmap(
+                    file_handle.fileno(), 0, access=mmap.ACCESS_READ
+                )
+            return file_handle.read()
+
+    def _binary_lines(self):
+        """Yield the lines of the bytes from the start, without copying the
+        rest of them. Lines are found by position, not by reading, so two
+        of these never disturb each other on a shared mapping."""
+        data = self.data
+        start = 0
+        while start < len(data):
+            end = data.find(b'\n', start) + 1 or len(data)
+            yield data[start:end]
+            start = end
+
+    @functools.cached_property
+    def encoding(self):
+        """Return the source encoding from the coding cookie or BOM."""
+        return tokenize.detect_encoding(
+            functools.partial(next, self._binary_lines(), b'')
+        )[0]
+
+    @functools.cached_property
+    def text(self):
+        """Return the decoded source, with universal newlines like
+        tokenize.open."""
+        # BytesIO shares bytes and copies a mapping once, to decode it.
+        reader = io.TextIOWrapper(io.BytesIO(self.data), encoding=self.encoding)
+        return reader.read()
+
+    @functools.cached_property
+    def content_hash(self):
+        """Return the hex SHA-256 digest of the file's bytes."""
+        return hash_bytes(self.data)
+
+    def lines(self):
+        """Yield the decoded lines without their line endings, only as far
+        as the caller asks, for parse_header.dict_header_from_lines."""
+        encoding = self.encoding
+        for raw_line in self._binary_lines():
+            yield raw_line.decode(encoding).rstrip('\r\n')
+
+    @functools.cached_property
+    def tree(self):
+        """Return the module's AST, or None if it doesn't parse."""
+        try:
+            return ast.parse(self.text, self.path)
+        except (SyntaxError, ValueError):
+            return None
+
+    @functools.cached_property
+    def tokens(self):
+        """Return the list of the module's tokens."""
+        return list(tokenize.generate_tokens(io.StringIO(self.text).readline))
+
+    @functools.cached_property
+    def stripped_source(self):
+        """Return the source without comments or function and class
+        docstrings, or None if it doesn't parse."""
+        if self.tree is None:
+            return None
+        # Strip the shared tree and put it back, which is much cheaper
+        # than copying it.
+        stripped = _strip_docstrings(self.tree)
+        try:
+            return ast.unparse(self.tree)
+        finally:
+            for (node, body) in stripped:
+                node.body = body
+
+
+class SourceIndex:
+    """ The SourceFile for each path, made the first time it is asked
+    for. """
+
+    def __init__(self):
+        """Initialize an empty index."""
+        self._files = {}
+
+    def __len__(self):
+        """Return the number of files indexed."""
+        return len(self._files)
+
+    def get(self, path):
+        """Return the SourceFile for path."""
+        key = os.path.normpath(path)
+        source = self._files.get(key)
+        if source is None:
+            source = self._files[key] = SourceFile(path)
+        return source
+
+    def clear(self):
+        """Forget every file, for example after they change on disk."""
+        self._files.clear()
+
+
+_INDEX = SourceIndex()
+
+
+def get_source(path):
+    """Return the SourceFile for path from the index shared by every
+    checker in this process."""
+    return _INDEX.get(path)
+
+
+def _make_tree(directory, copies):
+    """Copy the .py files next to this script copies times into directory
+    and return the paths of the copies."""
+    here = os.path.dirname(os.path.abspath(__file__))
+    originals = [
+        os.path.join(root, name)
+        for (root, _, names) in os.walk(os.path.dirname(here))
+        for name in names
+        if name.endswith('.py') and '.git' not in root
+    ]
+    paths = []
+    for copy_number in range(copies):
+        copy_directory = os.path.join(directory, str(copy_number))
+        os.makedirs(copy_directory)
+        for (number, original) in enumerate(originals):
+            path = os.path.join(copy_directory, f'{number}.py')
+            shutil.copyfile(original, path)
+            paths.append(path)
+    return paths
+
+
+def _read_per_check(path):
+    """Read and analyze path the way the checkers did on their own: once
+    for the header, once each to hash for lint and format, and again to
+    strip it."""
+    for _ in range(3):
+        with tokenize.open(path) as file_handle:
+            text = file_handle.read()
+    dict_header(text, silent=True, comments_startwith='#')
+    hash_bytes(text)
+    hash_bytes(text)
+    tree = ast.parse(text)
+    _strip_docstrings(tree)
+    ast.unparse(tree)
+    list(tokenize.generate_tokens(io.StringIO(text).readline))
+
+
+def _read_indexed(path):
+    """Get the same things from a fresh index."""
+    source = SourceIndex().get(path)
+    dict_header_from_lines(source.lines(), silent=True, comments_startwith='#')
+    # The lint and format checks share one hash.
+    _ = (source.content_hash, source.stripped_source, source.tokens)
+
+
+def main(copies=20):
+    """Time both ways of reading a tree of a few hundred files."""
+    with tempfile.TemporaryDirectory() as directory:
+        paths = _make_tree(directory, copies)
+        for (label, function) in (
+            ('separate reads', _read_per_check),
+            ('source index', _read_indexed),
+        ):
+            start = time.perf_counter()
+            for path in paths:
+                function(path)
+            elapsed = time.perf_counter() - start
+            print(f'{label:<16} {len(paths)} files {elapsed * 1000.0:9.1f} ms')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -3,6 +3,7 @@
 """
 Imports the the game demo and executes the main function.
 """
+import argparse
 import sys
 from os import environ
 # Hide the Hello to Pygame message
@@ -11,6 +12,41 @@ environ['PYGAME_HIDE_SUPPORT_PROMPT'] = 'YES'
 from videogame import game
 
 
+def main():
+    """Parse the command line and run the demo."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        '--hot-reload',
+        action='store_true',
+        help='reload videogame/scene.py and rebuild its scenes when it changes',
+    )
+    parser.add_argument(
+        '--memory-budget',
+        type=float,
+        metavar='MIB',
+        help='evict cached surfaces when scenes hold more than MIB mebibytes',
+    )
+    parser.add_argument(
+        '--memory-report',
+        action='store_true',
+        help='print the surface memory held by each scene and exit; '
+        'runs without a window',
+    )
+    args = parser.parse_args()
+    memory_budget = None
+    if args.memory_budget is not None:
+        memory_budget = int(args.memory_budget * 1024 * 1024)
+    if args.memory_report:
+        environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+        environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+    demo = game.MultiSceneGameDemo(
+        hot_reload=args.hot_reload, memory_budget=memory_budget
+    )
+    if args.memory_report:
+        print(demo.memory_report())
+        return 0
+    return demo.run()
+
 
 if __name__ == "__main__":
-    sys.exit(game.MultiSceneGameDemo().run())
+    sys.exit(main())
@@ -1,3 +1,26 @@
 """Init file for the PyGame demo."""
 
-__all__ = ["assets", "game", "rgbcolors", "scene", "scenemanager",]
+__all__ = [
+    "assets",
+    "audio",
+    "backgrounds",
+    "benchmark",
+    "colorspace",
+    "ecs",
+    "game",
+    "gccontrol",
+    "hotreload",
+    "memory",
+    "particles",
+    "pipeline",
+    "prerender",
+    "randomcolors",
+    "rendercache",
+    "resolution",
+    "rgbcolors",
+    "scene",
+    "scenemanager",
+    "tilemap",
+    "transitions",
+    "viewport",
+]
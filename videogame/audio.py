@@ -0,0 +1,120 @@
+"""Music and sound effects shared by every scene.
+
+Short sound effects are decoded once into pygame.mixer.Sound objects and
+kept. Music is streamed by pygame.mixer.music; its file is read into memory
+ahead of time so starting a track doesn't wait on the disk. Loading happens
+on a worker thread. When consecutive scenes use the same track the music
+keeps playing instead of being reloaded and faded in again.
+
+Like assets, there is one of these for the whole game; use get_manager()."""
+
+import concurrent.futures
+import functools
+import io
+
+import pygame
+
+
+class AudioManager:
+    """Cache sounds, prefetch music and keep a track playing across scenes."""
+
+    def __init__(self, workers=2):
+        """Initialize the manager with a pool of workers loading files."""
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix='audio'
+        )
+        self._sounds = {}
+        self._music_files = {}
+        self._current_track = None
+        self._released = False
+
+    @staticmethod
+    def _read_file(path):
+        """Return the contents of the file at path."""
+        with open(path, 'rb') as file_handle:
+            return file_handle.read()
+
+    def preload_sound(self, path):
+        """Start decoding the sound effect at path in the background."""
+        if path not in self._sounds:
+            self._sounds[path] = self._executor.submit(pygame.mixer.Sound, path)
+        return self._sounds[path]
+
+    def sound(self, path):
+        """Return the decoded pygame.mixer.Sound for path, waiting for it if
+        it is still loading. A sound that fails to load is forgotten, so a
+        later call, for example once the mixer is initialized, tries again."""
+        try:
+            return self.preload_sound(path).result()
+        except pygame.error:
+            del self._sounds[path]
+            raise
+        except OSError as error:
+            del self._sounds[path]
+            raise pygame.error(
+                f'Could not read sound {path}: {error}'
+            ) from error
+
+    def preload_music(self, path):
+        """Start reading the music file at path into memory in the
+        background."""
+        if path not in self._music_files:
+            self._music_files[path] = self._executor.submit(
+                self._read_file, path
+            )
+        return self._music_files[path]
+
+    @property
+    def current_track(self):
+        """Return the path of the music that is playing or None."""
+        if self._current_track and pygame.mixer.music.get_busy():
+            return self._current_track
+        return None
+
+    def play_music(self, path, volume=0.2, loops=-1, fade_ms=500):
+        """Stream the music at path. If it is already playing it carries on
+        without restarting."""
+        self._released = False
+        if self.current_track == path:
+            pygame.mixer.music.set_volume(volume)
+            return
+        try:
+            contents = self.preload_music(path).result()
+        except OSError as error:
+            # Forget the failed read so a later call tries again, and fail
+            # the way pygame.mixer.music.load does on a missing file.
+            del self._music_files[path]
+            raise pygame.error(
+                f'Could not read music {path}: {error}'
+            ) from error
+        pygame.mixer.music.stop()
+        pygame.mixer.music.load(io.BytesIO(contents), namehint=path)
+        pygame.mixer.music.set_volume(volume)
+        pygame.mixer.music.play(loops=loops, fade_ms=fade_ms)
+        self._current_track = path
+
+    def release_music(self):
+        """Let go of the music at the end of a scene. It keeps playing in
+        case the next scene asks for the same track."""
+        self._released = True
+
+    def stop_released_music(self, fade_ms=500):
+        """Fade out music that was released and not picked up again."""
+        if self._released:
+            self.stop_music(fade_ms)
+
+    def stop_music(self, fade_ms=0):
+        """Stop the music, fading it out over fade_ms milliseconds."""
+        if pygame.mixer.music.get_busy():
+            if fade_ms:
+                pygame.mixer.music.fadeout(fade_ms)
+            else:
+                pygame.mixer.music.stop()
+        self._current_track = None
+        self._released = False
+
+
+@functools.cache
+def get_manager():
+    """Return the game's AudioManager."""
+    return AudioManager()
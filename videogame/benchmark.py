@@ -0,0 +1,440 @@
+"""Benchmarks for the videogame package. They need no window and can be
+run from the command line:
+
+    python -m videogame.benchmark [name ...]
+
+With no names every benchmark runs. Each result is a mean time per frame;
+results that have a frame budget are checked against it and the exit status
+is 1 when any misses it."""
+
+import sys
+import tempfile
+import time
+
+import numpy
+import pygame
+
+from videogame import backgrounds
+from videogame import colorspace
+from videogame import ecs
+from videogame import particles
+from videogame import pipeline
+from videogame import randomcolors
+from videogame import rendercache
+from videogame import resolution
+from videogame import rgbcolors
+from videogame import scene
+from videogame import tilemap
+from videogame import transitions
+from videogame import viewport
+
+FRAME_BUDGET_MS = 1000.0 / 60
+
+
+def _mean_ms(function, repeat):
+    """Call function repeat times and return the mean milliseconds per call."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - start) * 1000.0 / repeat
+
+
+def bench_transitions(size=(1920, 1080), frames=60):
+    """Run each transition over frames frames at size. Return a list of
+    (name, mean milliseconds per frame, budget) tuples."""
+    outgoing = pygame.Surface(size, depth=32)
+    outgoing.fill(rgbcolors.red)
+    incoming = pygame.Surface(size, depth=32)
+    incoming.fill(rgbcolors.blue)
+    target = pygame.Surface(size, depth=32)
+    results = []
+    for transition_class in (
+        transitions.Fade,
+        transitions.Wipe,
+        transitions.Dissolve,
+    ):
+        transition = transition_class(duration_ms=frames)
+        transition.start(outgoing, incoming)
+        frame_ms = _mean_ms(lambda t=transition: t.update(1, target), frames)
+        results.append((transition_class.__name__, frame_ms, FRAME_BUDGET_MS))
+    return results
+
+
+def bench_entities(counts=(1000, 10000, 100000), size=(1920, 1080), frames=20):
+    """Update and draw count bouncing circles in an EntityStore for each of
+    counts. Return a list of (label, mean milliseconds per frame, None)."""
+    rng = numpy.random.default_rng(386)
+    target = pygame.Surface(size, depth=32)
+    bounds = target.get_rect()
+    palette = numpy.array(rgbcolors.all_colors[:16], dtype=numpy.uint8)
+    results = []
+    for count in counts:
+        store = ecs.EntityStore()
+        store.spawn(
+            count,
+            position=rng.uniform((0, 0), size, (count, 2)),
+            velocity=rng.uniform(-200, 200, (count, 2)),
+            radius=rng.integers(2, 6, count),
+            color=palette[rng.integers(0, len(palette), count)],
+        )
+        # A few large circles, whose radii don't fit in 8 bits.
+        store.spawn(
+            4,
+            position=rng.uniform((0, 0), size, (4, 2)),
+            velocity=rng.uniform(-200, 200, (4, 2)),
+            radius=(128, 130, 200, 255),
+            color=palette[:4],
+        )
+        renderer = ecs.EntityRenderer()
+
+        def update(store=store):
+            ecs.movement_system(store, 16)
+            ecs.bounce_system(store, bounds)
+
+        results.append((f'update {count}', _mean_ms(update, frames), None))
+        results.append(
+            (
+                f'draw {count}',
+                _mean_ms(lambda s=store, r=renderer: r.draw(target, s), frames),
+                None,
+            )
+        )
+    return results
+
+
+def bench_draw_queue(counts=(10, 100, 1000), frames=100):
+    """Draw count small sprites with one Surface.blit call each and through
+    a Scene's draw queue, which submits one Surface.blits call, queueing
+    them one at a time and a sprite's destinations at once. Return a list
+    of (label, mean milliseconds per frame, None)."""
+    target = pygame.Surface((800, 800), depth=32)
+    queue_scene = scene.Scene(target, rgbcolors.black)
+    sprites = []
+    for color in rgbcolors.all_colors[:8]:
+        sprite = pygame.Surface((16, 16), depth=32)
+        sprite.fill(color)
+        sprites.append(sprite)
+    results = []
+    for count in counts:
+        draws = [
+            (sprites[i % len(sprites)], ((i * 37) % 784, (i * 91) % 784))
+            for i in range(count)
+        ]
+        by_sprite = [
+            (sprite, [dest for (source, dest) in draws if source is sprite])
+            for sprite in sprites
+        ]
+
+        def blit_each(draws=draws):
+            for (sprite, dest) in draws:
+                target.blit(sprite, dest)
+
+        def queue_all(draws=draws):
+            for (sprite, dest) in draws:
+                queue_scene.queue_blit(sprite, dest)
+            queue_scene.submit_draw_queue()
+
+        def queue_batches(by_sprite=by_sprite):
+            for (sprite, destinations) in by_sprite:
+                queue_scene.queue_blits(sprite, destinations)
+            queue_scene.submit_draw_queue()
+
+        results.append((f'blit {count}', _mean_ms(blit_each, frames), None))
+        results.append((f'queue_blit {count}', _mean_ms(queue_all, frames), None))
+        results.append(
+            (f'queue_blits {count}', _mean_ms(queue_batches, frames), None)
+        )
+    return results
+
+
+def bench_tilemap(map_tiles=10000, size=(1920, 1080), frames=600):
+    """Scroll diagonally across a map_tiles by map_tiles map of 32 pixel
+    tiles, 8 pixels a frame. Return the mean milliseconds per frame, labeled
+    with the most chunks cached at once, against the frame budget."""
+    tileset = []
+    for color in rgbcolors.all_colors[:16]:
+        tile = pygame.Surface((32, 32), depth=32)
+        tile.fill(color)
+        tileset.append(tile)
+    # Untouched pages of a zeroed array are never allocated.
+    tiles = numpy.zeros((map_tiles, map_tiles), dtype=numpy.uint8)
+    tiles[::7, :] = 3
+    tiles[:, ::5] = 9
+    tile_map = tilemap.TileMap(tiles, tileset)
+    camera = viewport.Camera(size, pygame.Rect((0, 0), tile_map.pixel_size))
+    target = pygame.Surface(size, depth=32)
+    most_cached = 0
+
+    def scroll():
+        nonlocal most_cached
+        camera.move(8, 8)
+        tile_map.draw(target, camera)
+        most_cached = max(most_cached, tile_map.cached_chunks)
+
+    frame_ms = _mean_ms(scroll, frames)
+    label = f'scroll {map_tiles}x{map_tiles} ({most_cached} chunks)'
+    return [(label, frame_ms, FRAME_BUDGET_MS)]
+
+
+def bench_particles(count=50000, sizes=(1, 3, 8), frames=60):
+    """Keep count particles alive in an emitter for each particle size and
+    time one frame of update and draw. Stamped sizes are checked against the
+    frame budget; larger, blitted sizes are not. Return a list of (label,
+    mean milliseconds per frame, budget)."""
+    target = pygame.Surface((1920, 1080), depth=32)
+    results = []
+    for size in sizes:
+        emitter = particles.ParticleEmitter(
+            capacity=count, lifetime=(2.0, 4.0), size=size, seed=386
+        )
+        emitter.emit(count, (960, 540))
+
+        def frame(emitter=emitter):
+            emitter.update(16)
+            emitter.emit(count, (960, 540))
+            emitter.draw(target)
+
+        budget = None
+        if size <= particles.STAMP_SIZE_LIMIT:
+            budget = FRAME_BUDGET_MS
+        label = f'{count} particles, size {size}'
+        results.append((label, _mean_ms(frame, frames), budget))
+    return results
+
+
+class _PipelineScene(scene.Scene):
+    """A scene whose update is NumPy work and whose draw is blits, both of
+    which release the GIL."""
+
+    supports_snapshot = True
+
+    def __init__(self, screen):
+        super().__init__(screen, rgbcolors.black)
+        (width, height) = screen.get_size()
+        self._x = numpy.linspace(0.0, 8.0, width, dtype=numpy.float32)
+        self._y = numpy.linspace(0.0, 8.0, height, dtype=numpy.float32)
+        self._t = 0.0
+        self._field = numpy.zeros((width, height), dtype=numpy.uint32)
+        self._frame = pygame.Surface(screen.get_size(), depth=32)
+
+    def update_scene(self):
+        self._t += 0.1
+        wave = numpy.sin(self._x[:, None] + self._t) * numpy.cos(self._y)
+        self._field[...] = (wave * 127.0 + 128.0).astype(numpy.uint32) << 8
+
+    def snapshot(self):
+        return self._field.copy()
+
+    def draw_snapshot(self, state):
+        pygame.surfarray.blit_array(self._frame, state)
+        for _ in range(4):
+            self._screen.blit(self._background, (0, 0))
+            self._screen.blit(self._frame, (0, 0))
+
+
+def bench_pipeline(size=(1920, 1080), frames=60):
+    """Run a scene's update and draw one after the other and through a
+    FramePipeline, which only helps with more than one CPU. Return a list
+    of (label, mean milliseconds per frame, None)."""
+    screen = pygame.Surface(size, depth=32)
+    pipelined_scene = _PipelineScene(screen)
+
+    def serial():
+        pipelined_scene.update_scene()
+        pipelined_scene.draw_snapshot(pipelined_scene.snapshot())
+
+    frame_pipeline = pipeline.FramePipeline()
+    frame_pipeline.start(pipelined_scene)
+
+    def overlapped():
+        state = frame_pipeline.wait()
+        frame_pipeline.submit_update(pipelined_scene)
+        pipelined_scene.draw_snapshot(state)
+
+    results = [
+        ('serial', _mean_ms(serial, frames), None),
+        ('pipelined', _mean_ms(overlapped, frames), None),
+    ]
+    frame_pipeline.close()
+    return results
+
+
+def bench_resolution(
+    display_size=(1920, 1080),
+    logical_sizes=((1920, 1080), (960, 540), (640, 360), (1280, 720)),
+    frames=60,
+):
+    """Present a RenderTarget of each of logical_sizes on a display of
+    display_size. Return a list of (label, mean milliseconds per frame,
+    budget) tuples."""
+    display = pygame.Surface(display_size, depth=32)
+    results = []
+    for logical_size in logical_sizes:
+        render_target = resolution.RenderTarget(logical_size, display)
+        render_target.surface.fill(rgbcolors.orange)
+        scale = render_target.scale
+        label = f'{logical_size[0]}x{logical_size[1]} scale {scale:.3g}'
+        results.append(
+            (label, _mean_ms(render_target.present, frames), FRAME_BUDGET_MS)
+        )
+    return results
+
+
+def bench_rendercache(lines=200, size=24):
+    """Render lines lines of text with a font, then get the same renderings
+    from a cold and a warm RenderCache. Return a list of (label, mean
+    milliseconds per line, None)."""
+    pygame.font.init()
+    texts = [f'Line {i}: the quick brown fox jumps' for i in range(lines)]
+    text_font = pygame.font.Font(None, size)
+    results = [
+        (
+            'render',
+            _mean_ms(
+                lambda: [
+                    text_font.render(text, True, rgbcolors.white)
+                    for text in texts
+                ],
+                1,
+            )
+            / lines,
+            None,
+        )
+    ]
+    with tempfile.TemporaryDirectory() as directory:
+        cache = rendercache.RenderCache(directory)
+
+        def load_all():
+            return [
+                cache.get(
+                    ('text', text, size),
+                    lambda t=text: text_font.render(t, True, rgbcolors.white),
+                )
+                for text in texts
+            ]
+
+        results.append(('cold cache', _mean_ms(load_all, 1) / lines, None))
+        results.append(('warm cache', _mean_ms(load_all, 1) / lines, None))
+    return results
+
+
+def bench_colors(count=100000, size=(64, 64), rect=(0, 0, 8, 8)):
+    """Convert count named colors to pygame.Color, and fill a small rect
+    of a surface with them, from tuples and from colors mapped to the
+    surface once with a ColorMapper. Return a list of (label, mean
+    milliseconds per 1000 colors, None)."""
+    colors = [
+        rgbcolors.all_colors[i % len(rgbcolors.all_colors)]
+        for i in range(count)
+    ]
+    packed = list(map(rgbcolors.pack, colors))
+    surface = pygame.Surface(size)
+    mapper = rgbcolors.ColorMapper(surface)
+    mapped = list(map(mapper, colors))
+    return [
+        (
+            label,
+            _mean_ms(lambda f=function, v=values: list(map(f, v)), 1)
+            * 1000.0
+            / count,
+            None,
+        )
+        for (label, function, values) in (
+            ('Color(*tuple)', rgbcolors.tuple_to_color, colors),
+            ('to_color(packed)', rgbcolors.to_color, packed),
+            ('fill(tuple)', lambda color: surface.fill(color, rect), colors),
+            ('fill(mapped)', lambda color: surface.fill(color, rect), mapped),
+        )
+    ]
+
+
+def bench_random_colors(count=1000000):
+    """Draw count random colors with repeated rgbcolors.random_color calls,
+    and in bulk uniformly and weighted by hue family. Return a list of
+    (label, mean milliseconds per million colors, None)."""
+    uniform = randomcolors.ColorSampler(seed=1)
+    weighted = randomcolors.ColorSampler({'red': 2, 'orange': 1}, seed=1)
+    return [
+        (label, _mean_ms(function, 1) * 1000000.0 / count, None)
+        for (label, function) in (
+            (
+                'random_color()',
+                lambda: [rgbcolors.random_color() for _ in range(count)],
+            ),
+            ('ColorSampler.rgb', lambda: uniform.rgb(count)),
+            ('ColorSampler.packed', lambda: uniform.packed(count)),
+            ('ColorSampler.rgb weighted', lambda: weighted.rgb(count)),
+        )
+    ]
+
+
+def bench_colorspace(size=(1920, 1080), frames=10):
+    """Convert a surface's pixels to Lab and HSV and back, and turn its hues
+    through a palette table. Return a list of (label, mean milliseconds per
+    frame, budget or None)."""
+    surface = pygame.Surface(size, 0, 32)
+    backgrounds.color_ramp(surface, rgbcolors.all_colors[:16], angle=30.0)
+    pixels = pygame.surfarray.array3d(surface)
+    colorspace.adjust_lut(hue=30.0)
+    return [
+        (
+            'lab round trip',
+            _mean_ms(
+                lambda: colorspace.lab_to_rgb_array(
+                    colorspace.rgb_to_lab_array(pixels)
+                ),
+                frames,
+            ),
+            None,
+        ),
+        (
+            'hsv round trip',
+            _mean_ms(
+                lambda: colorspace.hsv_to_rgb_array(
+                    colorspace.rgb_to_hsv_array(pixels)
+                ),
+                frames,
+            ),
+            None,
+        ),
+        (
+            'adjust hue',
+            _mean_ms(lambda: colorspace.adjust(surface, hue=30.0), frames),
+            FRAME_BUDGET_MS,
+        ),
+    ]
+
+
+BENCHMARKS = {
+    'colorspace': bench_colorspace,
+    'colors': bench_colors,
+    'draw_queue': bench_draw_queue,
+    'entities': bench_entities,
+    'particles': bench_particles,
+    'pipeline': bench_pipeline,
+    'random_colors': bench_random_colors,
+    'rendercache': bench_rendercache,
+    'resolution': bench_resolution,
+    'tilemap': bench_tilemap,
+    'transitions': bench_transitions,
+}
+
+
+def main(argv=None):
+    """Run the named benchmarks, or all of them, and print the results."""
+    names = (argv if argv is not None else sys.argv[1:]) or list(BENCHMARKS)
+    status = 0
+    for name in names:
+        print(f'{name}:')
+        for (label, milliseconds, budget) in BENCHMARKS[name]():
+            verdict = ''
+            if budget is not None:
+                verdict = 'ok' if milliseconds <= budget else 'SLOW'
+                if milliseconds > budget:
+                    status = 1
+            print(f'  {label:<36} {milliseconds:9.3f} ms  {verdict}')
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,494 @@
+"""Convert colors between RGB and other color spaces.
+
+Colors are 8 bit sRGB (r, g, b) like the ones in rgbcolors. They convert to
+and from HSV and HSL, with hue in degrees and the rest in [0, 1], linear RGB
+in [0, 1] and CIE Lab under a D65 white point. Each conversion has a scalar
+version for one color and a vectorized version for NumPy arrays of colors
+with the channels in the last axis, such as the pixels of a surface.
+
+Blending in Lab rather than RGB keeps the midpoints of a blend as bright
+and saturated as the ends; gradient builds such a blend once as a lookup
+table. Changing the colors of a whole surface every frame is done through a
+table too: palette_lut runs a conversion over every color with 6 bits per
+channel once, and apply_palette looks each pixel up in it."""
+
+import colorsys
+import functools
+import math
+
+import numpy
+import pygame
+
+# sRGB primaries to CIE XYZ and back, as rows for the scalar conversions
+# and as arrays for the vectorized ones, and the D65 white point.
+_RGB_TO_XYZ_ROWS = (
+    (0.4124564, 0.3575761, 0.1804375),
+    (0.2126729, 0.7151522, 0.0721750),
+    (0.0193339, 0.1191920, 0.9503041),
+)
+_RGB_TO_XYZ = numpy.array(_RGB_TO_XYZ_ROWS, dtype=numpy.float32)
+_XYZ_TO_RGB_ROWS = tuple(
+    map(tuple, numpy.linalg.inv(numpy.array(_RGB_TO_XYZ_ROWS)).tolist())
+)
+_XYZ_TO_RGB = numpy.array(_XYZ_TO_RGB_ROWS, dtype=numpy.float32)
+_WHITE = (0.95047, 1.0, 1.08883)
+
+# The constants of the CIE Lab transfer function.
+_EPSILON = 216 / 24389
+_KAPPA = 24389 / 27
+
+# Entries in the table that maps linear values back to sRGB.
+_SRGB_STEPS = 65536
+
+PALETTE_BITS = 6
+
+# Rows of a surface apply_palette does at a time.
+PALETTE_BAND = 32
+
+
+def _to_linear(value):
+    """Return the linear value of an sRGB value in [0, 1]."""
+    if value <= 0.04045:
+        return value / 12.92
+    return ((value + 0.055) / 1.055) ** 2.4
+
+
+def _to_srgb(value):
+    """Return the sRGB value of a linear value in [0, 1]."""
+    if value <= 0.0031308:
+        return value * 12.92
+    return 1.055 * value ** (1 / 2.4) - 0.055
+
+
+@functools.cache
+def linear_lut():
+    """Return a 256 entry float32 array of the linear value of each 8 bit
+    sRGB channel value."""
+    return numpy.array(
+        [_to_linear(value / 255) for value in range(256)], dtype=numpy.float32
+    )
+
+
+@functools.cache
+def _srgb_lut():
+    """Return a uint8 array of the 8 bit sRGB value of linear values in
+    [0, 1] split into _SRGB_STEPS steps."""
+    linear = numpy.linspace(0.0, 1.0, _SRGB_STEPS, dtype=numpy.float64)
+    srgb = numpy.where(
+        linear <= 0.0031308,
+        linear * 12.92,
+        1.055 * linear ** (1 / 2.4) - 0.055,
+    )
+    return numpy.rint(srgb * 255).astype(numpy.uint8)
+
+
+def _to_byte(value):
+    """Return a value in [0, 1] as a clamped 8 bit channel value."""
+    return min(255, max(0, round(value * 255)))
+
+
+def rgb_to_linear(color):
+    """Return the linear (r, g, b) of an 8 bit sRGB color."""
+    table = linear_lut()
+    return tuple(float(table[channel]) for channel in color[:3])
+
+
+def linear_to_rgb(linear):
+    """Return the 8 bit sRGB color of a linear (r, g, b)."""
+    return tuple(
+        _to_byte(_to_srgb(min(1.0, max(0.0, value)))) for value in linear
+    )
+
+
+def rgb_to_linear_array(rgb):
+    """Return an array of 8 bit sRGB colors as float32 linear colors."""
+    return linear_lut()[numpy.asarray(rgb)[..., :3]]
+
+
+def linear_to_rgb_array(linear):
+    """Return an array of linear colors as uint8 sRGB colors."""
+    index = numpy.clip(linear, 0.0, 1.0) * (_SRGB_STEPS - 1) + 0.5
+    return _srgb_lut()[index.astype(numpy.intp)]
+
+
+def rgb_to_hsv(color):
+    """Return the (hue, saturation, value) of an 8 bit color."""
+    (hue, saturation, value) = colorsys.rgb_to_hsv(
+        *(channel / 255 for channel in color[:3])
+    )
+    return (hue * 360, saturation, value)
+
+
+def hsv_to_rgb(hsv):
+    """Return the 8 bit color of a (hue, saturation, value)."""
+    (hue, saturation, value) = hsv
+    return tuple(
+        map(_to_byte, colorsys.hsv_to_rgb(hue / 360 % 1, saturation, value))
+    )
+
+
+def rgb_to_hsl(color):
+    """Return the (hue, saturation, lightness) of an 8 bit color."""
+    (hue, lightness, saturation) = colorsys.rgb_to_hls(
+        *(channel / 255 for channel in color[:3])
+    )
+    return (hue * 360, saturation, lightness)
+
+
+def hsl_to_rgb(hsl):
+    """Return the 8 bit color of a (hue, saturation, lightness)."""
+    (hue, saturation, lightness) = hsl
+    return tuple(
+        map(
+            _to_byte,
+            colorsys.hls_to_rgb(hue / 360 % 1, lightness, saturation),
+        )
+    )
+
+
+def _hue_array(rgb, high, chroma):
+    """Return the hue in degrees of float colors with the given largest
+    channel and chroma, the largest less the smallest."""
+    (red, green, blue) = (rgb[..., 0], rgb[..., 1], rgb[..., 2])
+    safe = numpy.where(chroma > 0, chroma, 1)
+    hue = numpy.where(
+        high == red,
+        (green - blue) / safe,
+        numpy.where(
+            high == green, (blue - red) / safe + 2, (red - green) / safe + 4
+        ),
+    )
+    return numpy.where(chroma > 0, hue * 60 % 360, 0)
+
+
+def rgb_to_hsv_array(rgb):
+    """Return an array of 8 bit colors as float32 (hue, saturation,
+    value)."""
+    rgb = numpy.asarray(rgb)[..., :3].astype(numpy.float32) / 255
+    high = rgb.max(axis=-1)
+    chroma = high - rgb.min(axis=-1)
+    saturation = numpy.where(
+        high > 0, chroma / numpy.where(high > 0, high, 1), 0
+    )
+    return numpy.stack(
+        (_hue_array(rgb, high, chroma), saturation, high), axis=-1
+    ).astype(numpy.float32)
+
+
+def hsv_to_rgb_array(hsv):
+    """Return an array of (hue, saturation, value) as uint8 colors."""
+    hsv = numpy.asarray(hsv, dtype=numpy.float32)
+    (hue, saturation, value) = (hsv[..., 0], hsv[..., 1], hsv[..., 2])
+    channels = []
+    for offset in (5, 3, 1):
+        k = (offset + hue / 60) % 6
+        ramp = numpy.clip(numpy.minimum(k, 4 - k), 0, 1)
+        channels.append(value - value * saturation * ramp)
+    return _bytes_array(numpy.stack(channels, axis=-1))
+
+
+def rgb_to_hsl_array(rgb):
+    """Return an array of 8 bit colors as float32 (hue, saturation,
+    lightness)."""
+    rgb = numpy.asarray(rgb)[..., :3].astype(numpy.float32) / 255
+    high = rgb.max(axis=-1)
+    low = rgb.min(axis=-1)
+    chroma = high - low
+    lightness = (high + low) / 2
+    spread = 1 - numpy.abs(2 * lightness - 1)
+    saturation = numpy.where(
+        spread > 0, chroma / numpy.where(spread > 0, spread, 1), 0
+    )
+    return numpy.stack(
+        (_hue_array(rgb, high, chroma), saturation, lightness), axis=-1
+    ).astype(numpy.float32)
+
+
+def hsl_to_rgb_array(hsl):
+    """Return an array of (hue, saturation, lightness) as uint8 colors."""
+    hsl = numpy.asarray(hsl, dtype=numpy.float32)
+    (hue, saturation, lightness) = (hsl[..., 0], hsl[..., 1], hsl[..., 2])
+    amount = saturation * numpy.minimum(lightness, 1 - lightness)
+    channels = []
+    for offset in (0, 8, 4):
+        k = (offset + hue / 30) % 12
+        ramp = numpy.clip(numpy.minimum(k - 3, 9 - k), -1, 1)
+        channels.append(lightness - amount * ramp)
+    return _bytes_array(numpy.stack(channels, axis=-1))
+
+
+def _bytes_array(rgb):
+    """Return an array of float colors in [0, 1] as uint8 colors."""
+    return numpy.rint(numpy.clip(rgb, 0, 1) * 255).astype(numpy.uint8)
+
+
+def _lab_f(t):
+    """Return the CIE Lab transfer function of t."""
+    if t > _EPSILON:
+        return t ** (1 / 3)
+    return (_KAPPA * t + 16) / 116
+
+
+def _lab_f_inverse(f):
+    """Return the inverse of the CIE Lab transfer function at f."""
+    cube = f * f * f
+    if cube > _EPSILON:
+        return cube
+    return (116 * f - 16) / _KAPPA
+
+
+def _dot(row, vector):
+    """Return the dot product of a matrix row and a vector."""
+    return sum(x * y for (x, y) in zip(row, vector))
+
+
+def rgb_to_lab(color):
+    """Return the CIE (L, a, b) of an 8 bit color."""
+    linear = rgb_to_linear(color)
+    (fx, fy, fz) = (
+        _lab_f(_dot(row, linear) / white)
+        for (row, white) in zip(_RGB_TO_XYZ_ROWS, _WHITE)
+    )
+    return (116 * fy - 16, 500 * (fx - fy), 200 * (fy - fz))
+
+
+def lab_to_rgb(lab):
+    """Return the 8 bit color of a CIE (L, a, b), clamped to sRGB."""
+    (lightness, a, b) = lab
+    fy = (lightness + 16) / 116
+    xyz = [
+        _lab_f_inverse(f) * white
+        for (f, white) in zip((fy + a / 500, fy, fy - b / 200), _WHITE)
+    ]
+    return linear_to_rgb(_dot(row, xyz) for row in _XYZ_TO_RGB_ROWS)
+
+
+def rgb_to_lab_array(rgb):
+    """Return an array of 8 bit colors as float32 CIE (L, a, b)."""
+    xyz = rgb_to_linear_array(rgb) @ _RGB_TO_XYZ.T
+    xyz /= numpy.array(_WHITE, dtype=numpy.float32)
+    f = numpy.where(
+        xyz > _EPSILON,
+        numpy.cbrt(xyz),
+        (_KAPPA * xyz + 16) / 116,
+    )
+    (fx, fy, fz) = (f[..., 0], f[..., 1], f[..., 2])
+    return numpy.stack(
+        (116 * fy - 16, 500 * (fx - fy), 200 * (fy - fz)), axis=-1
+    ).astype(numpy.float32)
+
+
+def lab_to_rgb_array(lab):
+    """Return an array of CIE (L, a, b) as uint8 colors clamped to sRGB."""
+    lab = numpy.asarray(lab, dtype=numpy.float32)
+    fy = (lab[..., 0] + 16) / 116
+    f = numpy.stack((fy + lab[..., 1] / 500, fy, fy - lab[..., 2] / 200), -1)
+    cube = f * f * f
+    xyz = numpy.where(cube > _EPSILON, cube, (116 * f - 16) / _KAPPA)
+    xyz *= numpy.array(_WHITE, dtype=numpy.float32)
+    return linear_to_rgb_array(xyz @ _XYZ_TO_RGB.T)
+
+
+def _rgb_array(rgb):
+    """Return an array of 8 bit colors as float32."""
+    return numpy.asarray(rgb)[..., :3].astype(numpy.float32)
+
+
+def _rgb_bytes(color):
+    """Return a float color in [0, 255] as an 8 bit color."""
+    return tuple(min(255, max(0, round(channel))) for channel in color)
+
+
+def _rgb_bytes_array(rgb):
+    """Return an array of float colors in [0, 255] as uint8 colors."""
+    return numpy.rint(numpy.clip(rgb, 0, 255)).astype(numpy.uint8)
+
+
+# Each color space's scalar conversions from and to 8 bit colors, its
+# vectorized ones, and whether its first channel is a hue in degrees.
+SPACES = {
+    'rgb': (tuple, _rgb_bytes, _rgb_array, _rgb_bytes_array, False),
+    'linear': (
+        rgb_to_linear,
+        linear_to_rgb,
+        rgb_to_linear_array,
+        linear_to_rgb_array,
+        False,
+    ),
+    'hsv': (rgb_to_hsv, hsv_to_rgb, rgb_to_hsv_array, hsv_to_rgb_array, True),
+    'hsl': (rgb_to_hsl, hsl_to_rgb, rgb_to_hsl_array, hsl_to_rgb_array, True),
+    'lab': (rgb_to_lab, lab_to_rgb, rgb_to_lab_array, lab_to_rgb_array, False),
+}
+
+
+def lerp(color_a, color_b, t, space='lab'):
+    """Return the 8 bit color t of the way from color_a to color_b, blended
+    in space, one of the names in SPACES. Hues take the shorter way around
+    the color wheel."""
+    (to_space, from_space, _, _, has_hue) = SPACES[space]
+    start = to_space(color_a[:3])
+    end = list(to_space(color_b[:3]))
+    if has_hue:
+        end[0] = start[0] + (end[0] - start[0] + 180) % 360 - 180
+    return from_space([x + (y - x) * t for (x, y) in zip(start, end)])
+
+
+def gradient(colors, steps, space='lab'):
+    """Return a (steps, 3) uint8 array that blends evenly through the
+    sequence of colors in space, one of the names in SPACES. It is a drop
+    in for backgrounds.ramp_lut, which blends in RGB."""
+    (_, _, to_space, from_space, has_hue) = SPACES[space]
+    stops = to_space(numpy.asarray(colors, dtype=numpy.uint8)).astype(
+        numpy.float64
+    )
+    if len(stops) == 1:
+        stops = numpy.repeat(stops, 2, axis=0)
+    if has_hue:
+        stops[:, 0] = numpy.unwrap(stops[:, 0], period=360)
+    positions = numpy.linspace(0.0, 1.0, len(stops))
+    t = numpy.linspace(0.0, 1.0, steps)
+    blend = numpy.empty((steps, 3), dtype=numpy.float32)
+    for channel in range(3):
+        blend[:, channel] = numpy.interp(t, positions, stops[:, channel])
+    if has_hue:
+        blend[:, 0] %= 360
+    return from_space(blend)
+
+
+def _check_palette_bits(bits):
+    """Raise ValueError unless bits is a palette's bits per channel."""
+    if not 4 <= bits <= 8:
+        raise ValueError(
+            f'palette bits per channel must be 4 to 8, not {bits}'
+        )
+
+
+def _palette_colors(bits):
+    """Return a (2 ** (3 * bits), 3) uint8 array of every color with bits
+    bits per channel, in the order palette_index numbers them."""
+    levels = numpy.arange(1 << bits, dtype=numpy.uint16)
+    # Repeat the high bits into the low ones so the levels reach 255.
+    levels = (levels << (8 - bits)) | (levels >> (2 * bits - 8))
+    (red, green, blue) = numpy.meshgrid(levels, levels, levels, indexing='ij')
+    colors = numpy.stack((red, green, blue), axis=-1)
+    return colors.reshape(-1, 3).astype(numpy.uint8)
+
+
+def palette_lut(transform, bits=PALETTE_BITS):
+    """Return a table of what transform makes of every color with bits bits
+    per channel, for apply_palette. transform takes and returns arrays of
+    uint8 colors, for example
+    lambda rgb: hsv_to_rgb_array(rgb_to_hsv_array(rgb) + (30, 0, 0)).
+    bits must be 4 to 8; the table has 2 ** (3 * bits) entries."""
+    _check_palette_bits(bits)
+    return numpy.asarray(
+        transform(_palette_colors(bits)), dtype=numpy.uint8
+    ).reshape(-1, 3)
+
+
+def _palette_index(pixels, moves, scratch, index):
+    """Write the palette index of each of pixels into index, moving each
+    channel's bits into place with a (right shift, mask) from moves."""
+    for (move, (right, mask)) in enumerate(moves):
+        out = scratch if move else index
+        if right >= 0:
+            numpy.right_shift(pixels, right, out=out)
+        else:
+            numpy.left_shift(pixels, -right, out=out)
+        out &= mask
+        if move:
+            index |= scratch
+
+
+def _palette_format(surface, lut, bits):
+    """Return lut as pixel values of surface's format, without alpha, and
+    the (right shift, mask) that moves each channel of a pixel to its place
+    in a palette index."""
+    mapped = numpy.zeros(len(lut), dtype=numpy.uint32)
+    moves = []
+    for (channel, shift) in enumerate(surface.get_shifts()[:3]):
+        mapped |= lut[:, channel].astype(numpy.uint32) << shift
+        place = (2 - channel) * bits
+        moves.append((shift + 8 - bits - place, ((1 << bits) - 1) << place))
+    return (mapped, moves)
+
+
+def _apply_palette_32(surface, lut, bits):
+    """Apply a palette table to a 32 bit surface. The table is turned into
+    pixel values once; each channel's bits are moved to their place in the
+    index with one shift and mask. Rows are done a band at a time so the
+    scratch arrays stay in the cache."""
+    alpha_mask = surface.get_masks()[3]
+    (mapped, moves) = _palette_format(surface, lut, bits)
+    # pixels2d is indexed (x, y); its transpose has contiguous rows.
+    pixels = pygame.surfarray.pixels2d(surface).T
+    # Scratch space, the index, and the index widened for numpy.take.
+    buffers = [
+        numpy.empty((PALETTE_BAND, pixels.shape[1]), dtype=dtype)
+        for dtype in (numpy.uint32, numpy.uint32, numpy.intp)
+    ]
+    for top in range(0, pixels.shape[0], PALETTE_BAND):
+        band = pixels[top : top + PALETTE_BAND]
+        (part, whole, wide) = (buffer[: len(band)] for buffer in buffers)
+        _palette_index(band, moves, part, whole)
+        wide[...] = whole
+        if alpha_mask:
+            numpy.bitwise_and(band, alpha_mask, out=part)
+            numpy.take(mapped, wide, out=whole)
+            numpy.bitwise_or(whole, part, out=band)
+        else:
+            numpy.take(mapped, wide, out=band)
+    del pixels
+
+
+def apply_palette(surface, lut, bits=PALETTE_BITS):
+    """Replace every pixel of surface, in place, with its entry in lut, a
+    table from palette_lut made with the same bits. Alpha is kept. The
+    surface must be 24 or 32 bits per pixel."""
+    _check_palette_bits(bits)
+    if len(lut) != 1 << (3 * bits):
+        raise ValueError(f'lut is not a palette_lut with {bits} bits')
+    if surface.get_bytesize() == 4:
+        _apply_palette_32(surface, lut, bits)
+        return
+    pixels = pygame.surfarray.pixels3d(surface)
+    rgb = (pixels >> (8 - bits)).astype(numpy.intp)
+    index = (rgb[..., 0] << (2 * bits)) | (rgb[..., 1] << bits) | rgb[..., 2]
+    pixels[...] = lut[index]
+    del pixels
+
+
+def adjust_lut(hue=0.0, saturation=1.0, value=1.0, bits=PALETTE_BITS):
+    """Return a palette_lut that turns hues by hue degrees and scales
+    saturation and value. Tables are kept for the last few adjustments."""
+    # Pass every argument the same way so calls that name them and calls
+    # that don't share cached tables.
+    return _adjust_lut(hue, saturation, value, bits)
+
+
+@functools.lru_cache(maxsize=32)
+def _adjust_lut(hue, saturation, value, bits):
+    """Return the table for adjust_lut."""
+
+    def transform(rgb):
+        hsv = rgb_to_hsv_array(rgb)
+        hsv[:, 0] += hue
+        hsv[:, 1] *= saturation
+        hsv[:, 2] *= value
+        return hsv_to_rgb_array(hsv)
+
+    lut = palette_lut(transform, bits)
+    lut.flags.writeable = False
+    return lut
+
+
+def adjust(surface, hue=0.0, saturation=1.0, value=1.0):
+    """Turn the hues of surface's pixels by hue degrees and scale their
+    saturation and value, in place."""
+    apply_palette(surface, adjust_lut(hue, saturation, value))
+
+
+def perceived_distance(color_a, color_b):
+    """Return the CIE76 distance between two 8 bit colors, the Euclidean
+    distance in Lab; about 2.3 is the smallest difference most people see."""
+    return math.dist(rgb_to_lab(color_a), rgb_to_lab(color_b))
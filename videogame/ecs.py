@@ -0,0 +1,165 @@
+"""Entity-component storage for scenes with very many moving objects.
+
+Instead of one Python object per circle, every entity is a row in a NumPy
+structured array holding its components. Systems are functions that update
+every entity in one vectorized pass and the renderer hands all of them to a
+single Surface.blits call.
+
+Entities are identified by their row. Rows are kept packed, so despawning
+entities moves later rows down and changes their ids."""
+
+import itertools
+
+import numpy
+import pygame
+
+ENTITY_DTYPE = numpy.dtype(
+    [
+        ('position', numpy.float32, 2),
+        ('velocity', numpy.float32, 2),
+        ('radius', numpy.float32),
+        ('color', numpy.uint8, 3),
+    ]
+)
+
+
+class EntityStore:
+    """A growable, packed array of entities."""
+
+    def __init__(self, capacity=1024):
+        """Initialize an empty store with room for capacity entities."""
+        self._data = numpy.zeros(capacity, dtype=ENTITY_DTYPE)
+        self._count = 0
+
+    def __len__(self):
+        """Return the number of live entities."""
+        return self._count
+
+    @property
+    def components(self):
+        """Return a view of the live entities' rows. Fields are indexed by
+        name, such as store.components['position']."""
+        return self._data[: self._count]
+
+    def _reserve(self, capacity):
+        """Grow the backing array so it can hold capacity entities."""
+        if capacity > len(self._data):
+            grown = numpy.zeros(
+                max(capacity, 2 * len(self._data)), dtype=ENTITY_DTYPE
+            )
+            grown[: self._count] = self.components
+            self._data = grown
+
+    # pylint: disable-next=too-many-arguments,too-many-positional-arguments
+    def spawn(
+        self,
+        count,
+        position=(0.0, 0.0),
+        velocity=(0.0, 0.0),
+        radius=1.0,
+        color=(255, 255, 255),
+    ):
+        """Add count entities. Each component is either one value for all of
+        them or an array with one value per entity. Return their ids."""
+        start = self._count
+        self._reserve(start + count)
+        rows = self._data[start : start + count]
+        rows['position'] = position
+        rows['velocity'] = velocity
+        rows['radius'] = radius
+        rows['color'] = color
+        self._count += count
+        return numpy.arange(start, start + count)
+
+    def despawn(self, ids):
+        """Remove the entities with the given ids, keeping rows packed."""
+        keep = numpy.ones(self._count, dtype=bool)
+        keep[ids] = False
+        survivors = self.components[keep]
+        self._count = len(survivors)
+        self._data[: self._count] = survivors
+
+
+def movement_system(store, delta_time):
+    """Move every entity by its velocity, given in pixels per second, over
+    delta_time milliseconds."""
+    components = store.components
+    components['position'] += components['velocity'] * (delta_time / 1000.0)
+
+
+def bounce_system(store, bounds):
+    """Reflect entities off the inside edges of the bounds rect."""
+    components = store.components
+    position = components['position']
+    velocity = components['velocity']
+    radius = components['radius']
+    for (axis, low, high) in (
+        (0, bounds.left, bounds.right),
+        (1, bounds.top, bounds.bottom),
+    ):
+        low_edge = low + radius
+        high_edge = high - radius
+        outside = (position[:, axis] < low_edge) | (
+            position[:, axis] > high_edge
+        )
+        velocity[outside, axis] *= -1
+        numpy.clip(
+            position[:, axis], low_edge, high_edge, out=position[:, axis]
+        )
+
+
+# pylint: disable=too-few-public-methods
+class EntityRenderer:
+    """Draw entities as circles with one Surface.blits call per frame."""
+
+    def __init__(self, colorkey=(0, 0, 0)):
+        """Initialize the renderer. Circle sprites are drawn on colorkey,
+        which must not be an entity's color."""
+        self._colorkey = colorkey
+        self._sprites = {}
+
+    def _sprite(self, radius, color):
+        """Return the cached sprite for a circle of radius and color."""
+        key = (radius, color)
+        if key not in self._sprites:
+            sprite = pygame.Surface((2 * radius, 2 * radius))
+            sprite.fill(self._colorkey)
+            sprite.set_colorkey(self._colorkey, pygame.RLEACCEL)
+            pygame.draw.circle(sprite, color, (radius, radius), radius)
+            self._sprites[key] = sprite
+        return self._sprites[key]
+
+    def _batches(self, components):
+        """Yield (sprite, topleft positions) for each distinct look."""
+        # Pack each look into one int64 key: the radius above 24 bits of
+        # color, with room for any radius a surface can be.
+        radius = numpy.rint(components['radius']).astype(numpy.int64)
+        color = components['color'].astype(numpy.int64)
+        looks = (radius << 24) | (color[:, 0] << 16) | (color[:, 1] << 8)
+        looks |= color[:, 2]
+        (unique_looks, groups) = numpy.unique(looks, return_inverse=True)
+        topleft = components['position'] - radius[:, None]
+        if len(unique_looks) > 1:
+            # Sort once so each look's entities are one contiguous slice.
+            order = numpy.argsort(groups.reshape(-1), kind='stable')
+            splits = numpy.cumsum(numpy.bincount(groups.reshape(-1)))[:-1]
+            batches = numpy.split(topleft[order], splits)
+        else:
+            batches = [topleft]
+        for (look, positions) in zip(unique_looks.tolist(), batches):
+            sprite = self._sprite(
+                look >> 24,
+                ((look >> 16) & 0xFF, (look >> 8) & 0xFF, look & 0xFF),
+            )
+            yield (sprite, positions)
+
+    def draw(self, surface, store):
+        """Draw every entity in store onto surface."""
+        surface.blits(
+            itertools.chain.from_iterable(
+                zip(itertools.repeat(sprite), positions.tolist())
+                for (sprite, positions) in self._batches(store.components)
+            ),
+            doreturn=False,
+        )
+# pylint: enable=too-few-public-methods
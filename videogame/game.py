@@ -1,96 +1,439 @@
 """Game objects to create PyGame based games."""
 
+import asyncio
+import inspect
+import time
+import traceback
 import warnings
 
 import pygame
 
+from videogame import gccontrol
+from videogame import hotreload
+from videogame import memory
+from videogame import pipeline
+from videogame import resolution
 from videogame import rgbcolors
 from videogame import scene
 from videogame import scenemanager
 
 
+# How often, in frames, surface memory is checked against the budget.
+MEMORY_CHECK_FRAMES = 60
+
+
 def display_info():
     """Print out information about the display driver and video information."""
     print(f'The display is using the "{pygame.display.get_driver()}" driver.')
     print("Video Info:")
     print(pygame.display.Info())
 
-# pylint: disable=too-few-public-methods
+# pylint: disable=too-few-public-methods,too-many-instance-attributes
 class VideoGame:
     """Base class for creating PyGame games."""
 
+    # pylint: disable-next=too-many-arguments,too-many-positional-arguments
     def __init__(
         self,
         window_width=800,
         window_height=800,
         window_title="My Awesome Game",
+        gc_control=False,
+        pipelined=False,
+        logical_size=None,
+        fast_start=False,
+        hot_reload=False,
+        memory_budget=None,
     ):
-        """Initialize a new game with the given window size and window title."""
-        pygame.init()
+        """Initialize a new game with the given window size and window title.
+        When gc_control is True, the cyclic garbage collector only runs in the
+        idle time before each frame deadline. When pipelined is True, scenes
+        that can be drawn from a snapshot are updated on a worker thread
+        while the previous frame is drawn. When logical_size is given,
+        scenes draw at that size and each frame is scaled to the window.
+        When fast_start is True, only the display is initialized here and
+        other subsystems are initialized by the scenes that use them. When
+        hot_reload is True, videogame.scene and any modules passed to
+        watch_modules are reloaded when they change and the scenes from
+        them are rebuilt without restarting the game. When memory_budget
+        is given, the scenes' caches are evicted whenever their surfaces
+        hold more than memory_budget bytes."""
+        self._start_time = time.perf_counter()
+        # Milliseconds from the start of __init__ to each startup milestone.
+        self._startup = {}
+        self._fast_start = fast_start
+        if fast_start:
+            pygame.display.init()
+        else:
+            pygame.init()
+        self._startup['init_ms'] = self._elapsed_ms()
         self._window_size = (window_width, window_height)
         self._clock = pygame.time.Clock()
         self._screen = pygame.display.set_mode(self._window_size)
+        self._render_target = None
+        if logical_size:
+            self._render_target = resolution.RenderTarget(
+                logical_size, self._screen
+            )
+            self._screen = self._render_target.surface
         self._title = window_title
         pygame.display.set_caption(self._title)
+        self._startup['window_ms'] = self._elapsed_ms()
         self._game_is_over = False
         if not pygame.font:
             warnings.warn("Fonts disabled.", RuntimeWarning)
         if not pygame.mixer:
             warnings.warn("Sound disabled.", RuntimeWarning)
-        else:
+        elif not fast_start:
             pygame.mixer.init()
         self._scene_manager = None
+        self._gc_control = gc_control
+        self._pipeline = pipeline.FramePipeline() if pipelined else None
+        self._garbage_collector = gccontrol.FrameGarbageCollector()
+        self._frame_count = 0
+        self._last_tick = time.perf_counter()
+        self._memory_budget = memory_budget
+        self._evictions = 0
+        self._current_scene = None
+        self._module_watcher = None
+        if hot_reload:
+            self._module_watcher = hotreload.ModuleWatcher([scene])
+        # Background tasks exist only while run_async is running.
+        self._background_tasks = None
+        self._pending_coroutines = []
+
+    def watch_modules(self, *modules):
+        """Also reload modules, such as modules of the game's own scenes,
+        when they change. Does nothing unless hot_reload is on."""
+        if self._module_watcher:
+            for module in modules:
+                self._module_watcher.watch(module)
+
+    def _reload_scenes(self, current_scene):
+        """Reload changed modules, rebuild the scenes made from them and
+        return the scene to carry on with, which is a new one if
+        current_scene was rebuilt. If the new scene fails to start, the
+        error is reported and current_scene carries on."""
+        changed = self._module_watcher.poll()
+        if not changed:
+            return current_scene
+        rebuilt = self._scene_manager.rebuild(
+            {module.__name__ for module in changed}
+        )
+        new_scene = rebuilt.get(current_scene)
+        if new_scene is None:
+            return current_scene
+        current_scene.end_scene()
+        try:
+            new_scene.start_scene()
+        except Exception:  # pylint: disable=broad-exception-caught
+            print(f'Could not start {type(new_scene).__name__}:')
+            traceback.print_exc()
+            self._scene_manager.replace(new_scene, current_scene)
+            current_scene.start_scene()
+            return current_scene
+        self._current_scene = new_scene
+        return new_scene
+
+    def _check_memory(self):
+        """Evict caches if the scenes' surfaces are over the budget."""
+        if self._memory_budget is None or self._scene_manager is None:
+            return
+        held = self._scene_manager.surface_bytes()
+        if held <= self._memory_budget:
+            return
+        after = self._scene_manager.enforce_budget(
+            self._memory_budget, self._current_scene
+        )
+        if after < held:
+            self._evictions += 1
+        if after > self._memory_budget:
+            warnings.warn(
+                f"Scenes hold {memory.format_bytes(after)} of surfaces, "
+                "over the memory budget, with no caches left to evict.",
+                RuntimeWarning,
+            )
+
+    def memory_report(self):
+        """Return a report of the surface memory held by each built scene
+        and in total."""
+        lines = [f'{"Scene":<24} {"Surfaces":>8} {"Memory":>12}']
+        for (name, surfaces, held) in self._scene_manager.memory_report():
+            lines.append(
+                f'{name:<24} {surfaces:>8} {memory.format_bytes(held):>12}'
+            )
+        total = memory.format_bytes(self._scene_manager.surface_bytes())
+        lines.append(f'{"Total (shared once)":<24} {"":>8} {total:>12}')
+        if self._memory_budget is not None:
+            budget = memory.format_bytes(self._memory_budget)
+            lines.append(f'{"Budget":<24} {"":>8} {budget:>12}')
+        return '\n'.join(lines)
+
+    def _elapsed_ms(self):
+        """Return the milliseconds since the game started initializing."""
+        return (time.perf_counter() - self._start_time) * 1000.0
+
+    def stats(self):
+        """Return a dictionary of statistics about the running game. The
+        startup timeline has the milliseconds from the start of __init__
+        until pygame was initialized, the window opened, the scenes were
+        built and the first frame was shown."""
+        return {
+            'frames': self._frame_count,
+            'gc': self._garbage_collector.stats(),
+            'startup': dict(self._startup),
+            'memory': {
+                'surface_bytes': (
+                    self._scene_manager.surface_bytes()
+                    if self._scene_manager
+                    else 0
+                ),
+                'budget_bytes': self._memory_budget,
+                'evictions': self._evictions,
+            },
+        }
+
+    def _idle_ms(self, frame_rate):
+        """Return the milliseconds left until the next frame deadline."""
+        busy_ms = (time.perf_counter() - self._last_tick) * 1000.0
+        return 1000.0 / frame_rate - busy_ms
+
+    def _tick(self, frame_rate):
+        """Wait for the next frame deadline and return the milliseconds
+        since the previous frame. With GC control on, garbage is collected
+        in the time left before the deadline."""
+        if self._gc_control and frame_rate:
+            self._garbage_collector.collect_idle(self._idle_ms(frame_rate))
+        delta_time = self._clock.tick(frame_rate)
+        self._last_tick = time.perf_counter()
+        self._frame_count += 1
+        return delta_time
+
+    async def _tick_async(self, frame_rate):
+        """Like _tick, but the time left before the deadline is given to
+        the event loop so background tasks can run. A late frame, or one
+        with no frame rate, still yields once so they aren't starved."""
+        if self._gc_control and frame_rate:
+            self._garbage_collector.collect_idle(self._idle_ms(frame_rate))
+        idle_ms = self._idle_ms(frame_rate) if frame_rate else 0
+        await asyncio.sleep(max(idle_ms, 0) / 1000.0)
+        now = time.perf_counter()
+        delta_time = round((now - self._last_tick) * 1000.0)
+        self._last_tick = now
+        self._frame_count += 1
+        return delta_time
+
+    def add_background_task(self, coroutine):
+        """Run coroutine alongside run_async. It only gets the time between
+        frames, so it must await often. Tasks still running when the game
+        ends are cancelled."""
+        if self._background_tasks is None:
+            self._pending_coroutines.append(coroutine)
+            return
+        task = asyncio.get_running_loop().create_task(coroutine)
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
+    def _start_background_tasks(self):
+        """Start the background tasks added before run_async started."""
+        self._background_tasks = set()
+        for coroutine in self._pending_coroutines:
+            self.add_background_task(coroutine)
+        self._pending_coroutines = []
+
+    async def _cancel_background_tasks(self):
+        """Cancel the background tasks that are still running."""
+        tasks = self._background_tasks
+        self._background_tasks = None
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _present(self):
+        """Show the frame, scaling it to the window if it has a logical
+        size."""
+        if self._render_target:
+            self._render_target.present()
+        pygame.display.update()
+        if self._frame_count % MEMORY_CHECK_FRAMES == 0:
+            self._check_memory()
+        if 'first_frame_ms' not in self._startup:
+            self._startup['first_frame_ms'] = self._elapsed_ms()
+
+    def _play_transition(self, transition, outgoing, incoming_scene):
+        """Blend the outgoing frame into the first frame of the started
+        incoming_scene. Events go to the new scene while the transition plays."""
+        incoming_scene.draw()
+        incoming_scene.submit_draw_queue()
+        transition.start(outgoing, self._screen)
+        while not transition.finished:
+            delta_time = self._tick(incoming_scene.frame_rate())
+            for event in pygame.event.get():
+                incoming_scene.process_event(event)
+            transition.update(delta_time, self._screen)
+            self._present()
 
     def run(self):
         """Run the game; the main game loop."""
         raise NotImplementedError
-# pylint: enable=too-few-public-methods
+# pylint: enable=too-few-public-methods,too-many-instance-attributes
 
 
 # pylint: disable=too-few-public-methods
 class MultiSceneGameDemo(VideoGame):
     """Show a colored window with a colored message and a polygon."""
 
-    def __init__(self):
-        """Init the Pygame demo."""
-        super().__init__(window_title="Multi Scene Demo")
-        self._scene_manager = scenemanager.SceneManager(
-            [
-                scene.BlinkingTitle(
-                    self._screen,
-                    self._scene_manager,
-                    "Multi Scene Demo",
-                    rgbcolors.orange,
-                    72,
-                    rgbcolors.black,
-                ),
-                scene.RedCircleScene(self._screen, self._scene_manager),
-                scene.GreenCircleScene(self._screen, self._scene_manager),
-                scene.BlueCircleScene(self._screen, self._scene_manager),
-            ]
-        )
+    def __init__(self, transition=None, **kwargs):
+        """Init the Pygame demo. Scene changes play transition, an instance
+        of a videogame.transitions class, or are hard cuts when it is None.
+        Other keyword arguments are passed to VideoGame. With fast_start
+        each scene is built when it is reached instead of up front."""
+        super().__init__(window_title="Multi Scene Demo", **kwargs)
+        self._transition = transition
+        # Functions rather than scenes, so a scene can be rebuilt from the
+        # newest version of its class after a hot reload.
+        scenes = [
+            lambda: scene.BlinkingTitle(
+                self._screen,
+                self._scene_manager,
+                "Multi Scene Demo",
+                rgbcolors.orange,
+                72,
+                rgbcolors.black,
+            ),
+            lambda: scene.RedCircleScene(self._screen, self._scene_manager),
+            lambda: scene.GreenCircleScene(self._screen, self._scene_manager),
+            lambda: scene.BlueCircleScene(self._screen, self._scene_manager),
+        ]
+        self._scene_manager = scenemanager.SceneManager(scenes)
+        if not self._fast_start:
+            self._scene_manager.build_all()
+        self._startup['scenes_ms'] = self._elapsed_ms()
+
+    def _enter_scene(self, current_scene, last_frame):
+        """Start current_scene, playing the transition from last_frame."""
+        self._current_scene = current_scene
+        self._check_memory()
+        current_scene.start_scene()
+        if self._gc_control:
+            self._garbage_collector.freeze()
+        if last_frame is not None:
+            self._play_transition(self._transition, last_frame, current_scene)
+
+    def _leave_scene(self, current_scene):
+        """End current_scene and return its last frame if a transition
+        needs it."""
+        current_scene.end_scene()
+        if self._transition:
+            return self._screen.copy()
+        return None
+
+    @staticmethod
+    def _process_events(current_scene):
+        """Hand the pending events to current_scene."""
+        for event in pygame.event.get():
+            current_scene.process_event(event)
+
+    def _draw(self, current_scene):
+        """Draw current_scene and show it."""
+        current_scene.draw()
+        current_scene.submit_draw_queue()
+        # current_scene.render_updates()
+        self._present()
+
+    def _run_pipelined(self, current_scene):
+        """Play current_scene's frames, updating it on the worker thread
+        while the previous frame is drawn. Return the scene that was
+        playing, which is a new one if it was rebuilt by a hot reload."""
+        self._pipeline.start(current_scene)
+        while current_scene.is_valid():
+            delta_time = self._tick(current_scene.frame_rate())
+            state = self._pipeline.wait()
+            # The worker is idle until submit_update, so the scene can be
+            # replaced here.
+            if self._module_watcher:
+                reloaded_scene = self._reload_scenes(current_scene)
+                if reloaded_scene is not current_scene:
+                    current_scene = reloaded_scene
+                    self._pipeline.start(current_scene)
+                    state = self._pipeline.wait()
+            current_scene.delta_time = delta_time
+            self._process_events(current_scene)
+            self._pipeline.submit_update(current_scene)
+            current_scene.draw_snapshot(state)
+            current_scene.submit_draw_queue()
+            self._present()
+        self._pipeline.wait()
+        return current_scene
 
     def run(self):
         """Run the game; the main game loop."""
         scene_iterator = iter(self._scene_manager)
         current_scene = next(scene_iterator)
+        last_frame = None
+        if self._gc_control:
+            self._garbage_collector.start()
         while not self._game_is_over:
-            current_scene.start_scene()
+            self._enter_scene(current_scene, last_frame)
+            if self._pipeline and current_scene.supports_snapshot:
+                current_scene = self._run_pipelined(current_scene)
             while current_scene.is_valid():
-                current_scene.delta_time = self._clock.tick(
+                if self._module_watcher:
+                    current_scene = self._reload_scenes(current_scene)
+                current_scene.delta_time = self._tick(
                     current_scene.frame_rate()
                 )
-                for event in pygame.event.get():
-                    current_scene.process_event(event)
+                self._process_events(current_scene)
                 current_scene.update_scene()
-                current_scene.draw()
-                # current_scene.render_updates()
-                pygame.display.update()
-            current_scene.end_scene()
+                self._draw(current_scene)
+            last_frame = self._leave_scene(current_scene)
             try:
                 current_scene = next(scene_iterator)
             except StopIteration:
                 self._game_is_over = True
+        if self._pipeline:
+            self._pipeline.close()
+        self._garbage_collector.close()
         pygame.quit()
         return 0
+
+    async def run_async(self):
+        """Run the game as a coroutine, for example with
+        asyncio.run(game.run_async()). Each frame is a step of this
+        coroutine; the time left before a frame's deadline goes to the
+        background tasks added with add_background_task. A scene's
+        update_scene may be a coroutine function. Transitions between
+        scenes still block the event loop while they play."""
+        self._start_background_tasks()
+        scene_iterator = iter(self._scene_manager)
+        current_scene = next(scene_iterator)
+        last_frame = None
+        if self._gc_control:
+            self._garbage_collector.start()
+        try:
+            while not self._game_is_over:
+                self._enter_scene(current_scene, last_frame)
+                while current_scene.is_valid():
+                    if self._module_watcher:
+                        current_scene = self._reload_scenes(current_scene)
+                    current_scene.delta_time = await self._tick_async(
+                        current_scene.frame_rate()
+                    )
+                    self._process_events(current_scene)
+                    update = current_scene.update_scene()
+                    if inspect.isawaitable(update):
+                        await update
+                    self._draw(current_scene)
+                last_frame = self._leave_scene(current_scene)
+                try:
+                    current_scene = next(scene_iterator)
+                except StopIteration:
+                    self._game_is_over = True
+        finally:
+            # Also on an exception from a scene, so no task outlives the
+            # game and the collector's settings are put back.
+            await self._cancel_background_tasks()
+            self._garbage_collector.close()
+            pygame.quit()
+        return 0
 # pylint: enable=too-few-public-methods
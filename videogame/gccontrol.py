@@ -0,0 +1,116 @@
+"""Keep Python's cyclic garbage collector from pausing the game mid-frame.
+
+The collector is disabled while frames are being produced and collections
+are run by hand in the idle time left before the next frame deadline. Every
+collection, automatic or not, is timed so the pauses can be reported."""
+
+import gc
+import time
+
+
+class FrameGarbageCollector:
+    """Schedule cyclic garbage collections between frames and measure them."""
+
+    def __init__(self, min_idle_ms=1.0, force_factor=8):
+        """Initialize the collector. Idle windows shorter than min_idle_ms
+        are not used for collecting unless the youngest generation has grown
+        past force_factor times its threshold."""
+        self._min_idle_ms = min_idle_ms
+        self._force_factor = force_factor
+        self._active = False
+        self._pause_start = None
+        # Most recent pause per generation, used to guess if a collection fits.
+        self._estimate_ms = [0.0, 0.0, 0.0]
+        self._stats = {
+            'collections': 0,
+            'idle_collections': 0,
+            'forced_collections': 0,
+            'collected': 0,
+            'total_pause_ms': 0.0,
+            'max_pause_ms': 0.0,
+            'last_pause_ms': 0.0,
+        }
+        gc.callbacks.append(self._on_collection)
+
+    def _on_collection(self, phase, info):
+        """Time every collection; registered with gc.callbacks."""
+        if phase == 'start':
+            self._pause_start = time.perf_counter()
+            return
+        if self._pause_start is None:
+            return
+        pause_ms = (time.perf_counter() - self._pause_start) * 1000.0
+        self._pause_start = None
+        self._estimate_ms[info['generation']] = pause_ms
+        self._stats['collections'] += 1
+        self._stats['collected'] += info['collected']
+        self._stats['total_pause_ms'] += pause_ms
+        self._stats['last_pause_ms'] = pause_ms
+        self._stats['max_pause_ms'] = max(self._stats['max_pause_ms'], pause_ms)
+
+    @property
+    def active(self):
+        """Return True when automatic collection is being deferred."""
+        return self._active
+
+    def start(self):
+        """Turn off automatic collection; collections happen in collect_idle."""
+        gc.disable()
+        self._active = True
+
+    def stop(self):
+        """Move frozen objects back and turn automatic collection back on."""
+        gc.unfreeze()
+        gc.enable()
+        self._active = False
+
+    def close(self):
+        """Stop deferring collections and stop measuring them."""
+        if self._active:
+            self.stop()
+        if self._on_collection in gc.callbacks:
+            gc.callbacks.remove(self._on_collection)
+
+    def freeze(self):
+        """Collect everything once and move the survivors, which are the
+        long-lived objects built while setting up a scene, into the permanent
+        generation so later collections don't traverse them."""
+        gc.collect()
+        gc.freeze()
+
+    def collect_idle(self, idle_ms):
+        """Spend at most idle_ms collecting the oldest generation that is due
+        and whose last pause fits in the window. Return the generation that
+        was collected or None."""
+        if not self._active:
+            return None
+        counts = gc.get_count()
+        thresholds = gc.get_threshold()
+        if idle_ms < self._min_idle_ms:
+            if counts[0] > thresholds[0] * self._force_factor:
+                gc.collect(0)
+                self._stats['forced_collections'] += 1
+                return 0
+            return None
+        for generation in (2, 1, 0):
+            if (
+                counts[generation] > thresholds[generation]
+                and self._estimate_ms[generation] <= idle_ms
+            ):
+                gc.collect(generation)
+                self._stats['idle_collections'] += 1
+                return generation
+        return None
+
+    def stats(self):
+        """Return a dictionary describing the collection pauses so far."""
+        stats = dict(self._stats)
+        stats['deferring'] = self._active
+        stats['frozen'] = gc.get_freeze_count()
+        if stats['collections']:
+            stats['mean_pause_ms'] = (
+                stats['total_pause_ms'] / stats['collections']
+            )
+        else:
+            stats['mean_pause_ms'] = 0.0
+        return stats
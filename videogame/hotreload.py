@@ -0,0 +1,70 @@
+"""Reload changed modules while the game is running.
+
+A ModuleWatcher polls the modification times of a few modules' source files
+and reloads the ones that changed with importlib.reload. Everything else in
+the running game, the window, the mixer and the caches of sounds and
+renderings, stays as it is; the game only has to rebuild the scenes whose
+classes came from a reloaded module. Scenes built from functions that look
+their class up when called, such as lambda: scene.RedCircleScene(...), pick
+up the new classes.
+
+This is a development aid. Objects made before a reload keep their old
+classes, and a module that imports names from a reloaded module with
+"from module import name" keeps the old names until it is reloaded too."""
+
+import importlib
+import os
+import time
+import traceback
+
+
+class ModuleWatcher:
+    """Reload modules when their source files change."""
+
+    def __init__(self, modules, interval_ms=500):
+        """Watch modules, checking their files at most once every
+        interval_ms milliseconds."""
+        self._interval = interval_ms / 1000.0
+        self._next_poll = 0.0
+        self._modules = {}
+        for module in modules:
+            self.watch(module)
+
+    def watch(self, module):
+        """Start watching module."""
+        self._modules[module.__name__] = (module, self._mtime(module))
+
+    @staticmethod
+    def _mtime(module):
+        """Return the modification time of module's source file, or None
+        if it can't be read."""
+        try:
+            return os.stat(module.__file__).st_mtime_ns
+        except (OSError, TypeError):
+            return None
+
+    def poll(self):
+        """Reload the watched modules whose files changed and return them.
+        A module that fails to reload is reported and left as it was."""
+        now = time.monotonic()
+        if now < self._next_poll:
+            return []
+        self._next_poll = now + self._interval
+        reloaded = []
+        for (name, (module, mtime)) in list(self._modules.items()):
+            new_mtime = self._mtime(module)
+            if new_mtime == mtime:
+                continue
+            # Record the time first so a broken file is reported only once
+            # per save.
+            self._modules[name] = (module, new_mtime)
+            try:
+                module = importlib.reload(module)
+            except Exception:  # pylint: disable=broad-exception-caught
+                print(f'Could not reload {name}:')
+                traceback.print_exc()
+                continue
+            self._modules[name] = (module, new_mtime)
+            print(f'Reloaded {name}.')
+            reloaded.append(module)
+        return reloaded
@@ -0,0 +1,31 @@
+"""Account for the memory held by surfaces.
+
+A surface's pixels take its pitch, the bytes in a row including any padding,
+times its height. A subsurface shares its parent's pixels and so counts as
+nothing. The same surface is often held by more than one scene, a shared
+rendering from videogame.rendercache for instance, so totals count each
+surface once."""
+
+
+def surface_bytes(surface):
+    """Return the bytes of pixel memory surface holds."""
+    if surface.get_parent() is not None:
+        return 0
+    return surface.get_pitch() * surface.get_height()
+
+
+def total_bytes(surfaces):
+    """Return the bytes held by surfaces, counting each surface once."""
+    unique = {id(surface): surface for surface in surfaces}
+    return sum(map(surface_bytes, unique.values()))
+
+
+def format_bytes(count):
+    """Return count bytes as a short human readable string."""
+    if count < 1024:
+        return f'{count} B'
+    for unit in ('KiB', 'MiB'):
+        count /= 1024
+        if count < 1024:
+            return f'{count:.1f} {unit}'
+    return f'{count / 1024:.1f} GiB'
@@ -0,0 +1,160 @@
+"""A particle system whose state lives in NumPy arrays.
+
+An emitter keeps each particle's position, velocity, age and lifetime in
+arrays and advances all of them with a few vectorized operations per frame.
+Particles fade through a color ramp, such as one made from rgbcolors colors,
+as they age. Dead particles are dropped by boolean indexing, which keeps the
+live ones packed at the front of the arrays without a Python loop. Drawing
+uses one pre-rendered sprite per step of the ramp; particles of only a few
+pixels are stamped straight into a 32 bit surface's pixels instead, which
+is much cheaper than a blit each."""
+
+import math
+
+import numpy
+import pygame
+
+from videogame import backgrounds
+from videogame import rgbcolors
+
+# Particles up to this many pixels square are stamped rather than blitted.
+STAMP_SIZE_LIMIT = 4
+
+FIRE_COLORS = (
+    rgbcolors.white,
+    rgbcolors.yellow,
+    rgbcolors.orange,
+    rgbcolors.red,
+    rgbcolors.dark_red,
+)
+
+
+# pylint: disable=too-many-instance-attributes
+class ParticleEmitter:
+    """Emit, update and draw particles."""
+
+    # pylint: disable-next=too-many-arguments,too-many-positional-arguments
+    def __init__(
+        self,
+        capacity=50000,
+        colors=FIRE_COLORS,
+        lifetime=(0.5, 1.5),
+        speed=(50.0, 200.0),
+        gravity=(0.0, 100.0),
+        size=2,
+        color_steps=32,
+        seed=None,
+    ):
+        """Initialize an emitter holding at most capacity particles. Each
+        particle lives a random number of seconds in the lifetime range,
+        starts at a random speed in pixels per second from the speed range
+        and is pulled by gravity in pixels per second squared. Particles are
+        size pixels square and pass through color_steps colors of the ramp
+        through colors. Lifetimes must be more than zero seconds."""
+        if min(lifetime) <= 0:
+            raise ValueError(f'lifetime {lifetime} is not positive')
+        self._capacity = capacity
+        self._position = numpy.zeros((capacity, 2), dtype=numpy.float32)
+        self._velocity = numpy.zeros((capacity, 2), dtype=numpy.float32)
+        self._age = numpy.zeros(capacity, dtype=numpy.float32)
+        self._lifetime = numpy.ones(capacity, dtype=numpy.float32)
+        self._count = 0
+        self._settings = {
+            'lifetime': lifetime,
+            'speed': speed,
+            'gravity': numpy.asarray(gravity, dtype=numpy.float32),
+            'size': size,
+        }
+        self._ramp = backgrounds.ramp_lut(colors, color_steps)
+        self._sprites = []
+        for color in self._ramp.tolist():
+            sprite = pygame.Surface((size, size))
+            sprite.fill(color)
+            self._sprites.append(sprite)
+        self._rng = numpy.random.default_rng(seed)
+
+    def __len__(self):
+        """Return the number of live particles."""
+        return self._count
+
+    def emit(self, count, position, direction=0.0, spread=math.tau):
+        """Emit up to count particles from position heading direction
+        radians, give or take half of spread. Return how many were emitted,
+        which is fewer than count when the emitter is full."""
+        count = min(count, self._capacity - self._count)
+        new = slice(self._count, self._count + count)
+        angle = direction + self._rng.uniform(-spread / 2, spread / 2, count)
+        speed = self._rng.uniform(*self._settings['speed'], count)
+        self._position[new] = position
+        self._velocity[new, 0] = numpy.cos(angle) * speed
+        self._velocity[new, 1] = numpy.sin(angle) * speed
+        self._age[new] = 0.0
+        self._lifetime[new] = self._rng.uniform(
+            *self._settings['lifetime'], count
+        )
+        self._count += count
+        return count
+
+    def update(self, delta_time):
+        """Advance every particle by delta_time milliseconds and drop the
+        ones that have outlived their lifetime."""
+        seconds = delta_time / 1000.0
+        live = slice(0, self._count)
+        velocity = self._velocity[live]
+        velocity += self._settings['gravity'] * seconds
+        self._position[live] += velocity * seconds
+        self._age[live] += seconds
+        alive = self._age[live] < self._lifetime[live]
+        survivors = int(numpy.count_nonzero(alive))
+        if survivors < self._count:
+            for array in (
+                self._position,
+                self._velocity,
+                self._age,
+                self._lifetime,
+            ):
+                array[:survivors] = array[live][alive]
+            self._count = survivors
+
+    def _color_steps(self):
+        """Return each live particle's step along the color ramp."""
+        live = slice(0, self._count)
+        steps = self._age[live] / self._lifetime[live]
+        steps *= len(self._ramp) - 1
+        return steps.astype(numpy.intp)
+
+    def draw(self, surface, offset=(0, 0)):
+        """Draw the particles onto surface, shifted by offset."""
+        if not self._count:
+            return
+        size = self._settings['size']
+        topleft = self._position[: self._count] + (
+            numpy.asarray(offset, dtype=numpy.float32) - size / 2
+        )
+        if size <= STAMP_SIZE_LIMIT and surface.get_bytesize() == 4:
+            self._stamp(surface, topleft, size)
+            return
+        surface.blits(
+            zip(
+                map(self._sprites.__getitem__, self._color_steps().tolist()),
+                topleft.tolist(),
+            ),
+            doreturn=False,
+        )
+
+    def _stamp(self, surface, topleft, size):
+        """Write size by size particles straight into a 32 bit surface, one
+        vectorized store per pixel of the square."""
+        (width, height) = surface.get_size()
+        x = numpy.floor(topleft[:, 0]).astype(numpy.intp)
+        y = numpy.floor(topleft[:, 1]).astype(numpy.intp)
+        colors = pygame.surfarray.map_array(surface, self._ramp)
+        colors = colors[self._color_steps()]
+        pixels = pygame.surfarray.pixels2d(surface)
+        for dx in range(size):
+            for dy in range(size):
+                (px, py) = (x + dx, y + dy)
+                inside = (px >= 0) & (px < width) & (py >= 0) & (py < height)
+                pixels[px[inside], py[inside]] = colors[inside]
+        del pixels
+# pylint: enable=too-many-instance-attributes
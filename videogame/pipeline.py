@@ -0,0 +1,57 @@
+"""Overlap a scene's update for the next frame with drawing this frame.
+
+A scene that supports pipelining sets Scene.supports_snapshot, returns a
+snapshot of everything its draw needs from Scene.snapshot and draws from
+that snapshot in Scene.draw_snapshot. The pipeline runs update_scene followed by snapshot on
+a worker thread while the main thread draws the previous snapshot. There are
+always two snapshots, the one being drawn and the one being built, so draw
+never sees a half updated scene. Pygame's surface operations and NumPy
+release the GIL, so the two threads really do run at the same time.
+
+Frames are shown one update later than in the serial loop."""
+
+import concurrent.futures
+
+
+def _update_and_snapshot(scene):
+    """Update scene and return its snapshot; runs on the worker thread."""
+    scene.update_scene()
+    return scene.snapshot()
+
+
+class FramePipeline:
+    """Run update_scene and snapshot for frame N + 1 on a worker thread
+    while frame N is drawn."""
+
+    def __init__(self):
+        """Initialize the pipeline and its worker thread."""
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix='update'
+        )
+        self._pending = None
+        self._snapshot = None
+
+    def start(self, scene):
+        """Take the first snapshot of scene on this thread."""
+        self.wait()
+        self._snapshot = scene.snapshot()
+
+    def wait(self):
+        """Wait for the worker to finish and return the newest snapshot.
+        The scene may be changed safely until the next call to
+        submit_update."""
+        if self._pending is not None:
+            self._snapshot = self._pending.result()
+            self._pending = None
+        return self._snapshot
+
+    def submit_update(self, scene):
+        """Start updating scene and taking its next snapshot on the worker
+        thread."""
+        self.wait()
+        self._pending = self._executor.submit(_update_and_snapshot, scene)
+
+    def close(self):
+        """Wait for the worker and stop its thread."""
+        self.wait()
+        self._executor.shutdown()
@@ -0,0 +1,162 @@
+"""Render procedural scene backgrounds in parallel on all cores.
+
+The background is split into tiles and every tile is rendered by a worker
+process straight into a shared memory block. When the workers are done the
+block is copied once into a surface that owns its pixels, and the block is
+released, so the surface stays valid however long it is kept.
+
+A tile function is any picklable callable (a module level function or a
+functools.partial of one) called as tile_function(tile_rect, size) where
+tile_rect is (x, y, width, height) and size is the background's size. It
+returns width * height * 4 bytes of pixels, one row after another, in the
+background's pixel format ('RGBX' by default)."""
+
+import concurrent.futures
+import functools
+import hashlib
+import random
+from multiprocessing import shared_memory
+
+import pygame
+
+BYTES_PER_PIXEL = 4
+
+
+def tile_rects(size, tile_size):
+    """Return the (x, y, width, height) tiles that cover size."""
+    (width, height) = size
+    (tile_width, tile_height) = tile_size
+    return [
+        (x, y, min(tile_width, width - x), min(tile_height, height - y))
+        for y in range(0, height, tile_height)
+        for x in range(0, width, tile_width)
+    ]
+
+
+def _render_tile(shm_name, size, tile_rect, tile_function):
+    """Render one tile in a worker process and copy its rows into the
+    shared memory block named shm_name."""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        (width, _) = size
+        (x, y, tile_width, tile_height) = tile_rect
+        pixels = memoryview(tile_function(tile_rect, size))
+        row_bytes = tile_width * BYTES_PER_PIXEL
+        if tile_width == width:
+            start = y * width * BYTES_PER_PIXEL
+            shm.buf[start : start + row_bytes * tile_height] = pixels
+        else:
+            for row in range(tile_height):
+                start = ((y + row) * width + x) * BYTES_PER_PIXEL
+                shm.buf[start : start + row_bytes] = pixels[
+                    row * row_bytes : (row + 1) * row_bytes
+                ]
+        pixels.release()
+    finally:
+        shm.close()
+
+
+class PrerenderedBackground:
+    """A background surface whose pixels were rendered by a process pool
+    through shared memory."""
+
+    # pylint: disable-next=too-many-arguments,too-many-positional-arguments
+    def __init__(
+        self,
+        size,
+        tile_function,
+        tile_size=(256, 256),
+        workers=None,
+        pixel_format='RGBX',
+    ):
+        """Render a background of the given size with tile_function using
+        up to workers processes (all cores when None)."""
+        (width, height) = size
+        shm = shared_memory.SharedMemory(
+            create=True, size=width * height * BYTES_PER_PIXEL
+        )
+        try:
+            with concurrent.futures.ProcessPoolExecutor(workers) as executor:
+                futures = [
+                    executor.submit(
+                        _render_tile, shm.name, size, rect, tile_function
+                    )
+                    for rect in tile_rects(size, tile_size)
+                ]
+                for future in concurrent.futures.as_completed(futures):
+                    future.result()
+            # A surface from frombuffer only borrows the block's pixels;
+            # copy them so nothing refers to the block once it is closed.
+            borrowed = pygame.image.frombuffer(shm.buf, size, pixel_format)
+            self._surface = borrowed.copy()
+            del borrowed
+        finally:
+            shm.close()
+            shm.unlink()
+
+    @property
+    def surface(self):
+        """Return the rendered surface."""
+        return self._surface
+
+    def close(self):
+        """Drop this object's reference to the surface. The surface itself
+        owns its pixels and stays usable wherever else it is held."""
+        self._surface = None
+
+
+def gradient_tile(top_color, bottom_color, tile_rect, size):
+    """Tile function for a vertical gradient from top_color to bottom_color.
+    Use functools.partial to bind the colors."""
+    (_, y, tile_width, tile_height) = tile_rect
+    (_, height) = size
+    rows = []
+    for row in range(y, y + tile_height):
+        t = row / max(height - 1, 1)
+        color = tuple(
+            round(top + (bottom - top) * t)
+            for (top, bottom) in zip(top_color, bottom_color)
+        )
+        rows.append(bytes(color[:3] + (255,)) * tile_width)
+    return b''.join(rows)
+
+
+def _tile_seed(seed, tile_rect, size):
+    """Return an integer seed for a tile mixed from seed, an int, str or
+    bytes, and the tile's position. Unlike hash(), it is the same on every
+    run whatever PYTHONHASHSEED is."""
+    if isinstance(seed, int):
+        length = seed.bit_length() // 8 + 1
+        seed = seed.to_bytes(length, 'little', signed=True)
+    elif isinstance(seed, str):
+        seed = seed.encode('utf-8')
+    elif not isinstance(seed, (bytes, bytearray)):
+        raise TypeError(f'seed must be an int, str or bytes, not {seed!r}')
+    digest = hashlib.blake2b(bytes(seed), digest_size=8)
+    for value in (*tile_rect[:2], *size):
+        digest.update(value.to_bytes(8, 'little', signed=True))
+    return int.from_bytes(digest.digest(), 'little')
+
+
+def noise_tile(seed, tile_rect, size):
+    """Tile function for grey value noise. The noise depends only on seed
+    and the tile's position so the result is the same with any number of
+    workers. Use functools.partial to bind the seed."""
+    (_, _, tile_width, tile_height) = tile_rect
+    rng = random.Random(_tile_seed(seed, tile_rect, size))
+    values = rng.randbytes(tile_width * tile_height)
+    pixels = bytearray(len(values) * BYTES_PER_PIXEL)
+    pixels[0::BYTES_PER_PIXEL] = values
+    pixels[1::BYTES_PER_PIXEL] = values
+    pixels[2::BYTES_PER_PIXEL] = values
+    pixels[3::BYTES_PER_PIXEL] = b'\xff' * len(values)
+    return pixels
+
+
+def gradient_background(size, top_color, bottom_color, **kwargs):
+    """Return a PrerenderedBackground holding a vertical gradient."""
+    return PrerenderedBackground(
+        size,
+        functools.partial(gradient_tile, top_color, bottom_color),
+        **kwargs,
+    )
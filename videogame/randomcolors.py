@@ -0,0 +1,122 @@
+"""Random colors in bulk.
+
+rgbcolors.random_color picks one color per call, which is fine for a scene
+that needs a handful but not for a particle system or a procedural scene
+that needs thousands a frame. A ColorSampler draws any number of colors at
+once with NumPy, as indices into rgbcolors.all_colors, so the colors come
+back as arrays: packed 0xRRGGBBAA integers, or (count, 3) uint8 RGB rows
+like the color component in videogame.ecs.
+
+Colors can be weighted by hue family. Each named color belongs to one
+family, found from its hue, or to gray when it has little saturation or
+brightness. A family's weight is shared among its colors, so weighting two
+families evenly picks from each equally often however many colors each has.
+A sampler made with a seed draws the same colors every run."""
+
+import colorsys
+
+import numpy
+
+from videogame import rgbcolors
+
+# Hue families and the hue, in degrees, each one ends at. Red wraps around
+# from the end of the circle.
+HUE_FAMILIES = (
+    ('red', 15),
+    ('orange', 45),
+    ('yellow', 70),
+    ('green', 165),
+    ('cyan', 200),
+    ('blue', 260),
+    ('purple', 320),
+    ('pink', 345),
+)
+
+# Colors with less saturation or brightness than this are gray.
+GRAY_THRESHOLD = 0.15
+
+FAMILIES = tuple(name for (name, _) in HUE_FAMILIES) + ('gray',)
+
+
+def hue_family(color):
+    """Return the name of the hue family of color, an (r, g, b) tuple."""
+    (hue, saturation, value) = colorsys.rgb_to_hsv(
+        *(channel / 255 for channel in color[:3])
+    )
+    if saturation < GRAY_THRESHOLD or value < GRAY_THRESHOLD:
+        return 'gray'
+    degrees = hue * 360
+    for (name, end) in HUE_FAMILIES:
+        if degrees < end:
+            return name
+    return 'red'
+
+
+# rgbcolors.all_colors as arrays, in the same order, and the index of each
+# color's family in FAMILIES.
+PACKED = numpy.array(rgbcolors.all_packed_colors, dtype=numpy.uint32)
+RGB = numpy.array(rgbcolors.all_colors, dtype=numpy.uint8)
+_FAMILY_INDEX = numpy.array(
+    [FAMILIES.index(hue_family(color)) for color in rgbcolors.all_colors],
+    dtype=numpy.intp,
+)
+
+
+def family_sizes():
+    """Return a dictionary of the number of colors in each hue family."""
+    counts = numpy.bincount(_FAMILY_INDEX, minlength=len(FAMILIES))
+    return dict(zip(FAMILIES, counts.tolist()))
+
+
+class ColorSampler:
+    """Draw random colors from rgbcolors.all_colors in bulk."""
+
+    def __init__(self, weights=None, seed=None):
+        """Initialize a sampler. weights is a dictionary of hue family
+        names to weights, with families left out weighted zero; with no
+        weights every color is equally likely, as with
+        rgbcolors.random_color. seed makes the colors repeatable."""
+        unknown = set(weights or ()) - set(FAMILIES)
+        if unknown:
+            raise ValueError(f'unknown hue families: {sorted(unknown)}')
+        self._rng = numpy.random.default_rng(seed)
+        self._cumulative = None
+        if weights:
+            family_weights = numpy.array(
+                [weights.get(name, 0.0) for name in FAMILIES],
+                dtype=numpy.float64,
+            )
+            sizes = numpy.bincount(_FAMILY_INDEX, minlength=len(FAMILIES))
+            # Share each family's weight among its colors.
+            shares = numpy.divide(
+                family_weights,
+                sizes,
+                out=numpy.zeros_like(family_weights),
+                where=sizes > 0,
+            )
+            cumulative = numpy.cumsum(shares[_FAMILY_INDEX])
+            if cumulative[-1] <= 0:
+                raise ValueError('weights select no colors')
+            self._cumulative = cumulative / cumulative[-1]
+
+    def indices(self, count):
+        """Return count random indices into rgbcolors.all_colors."""
+        if self._cumulative is None:
+            return self._rng.integers(0, len(PACKED), count)
+        return numpy.searchsorted(
+            self._cumulative, self._rng.random(count), side='right'
+        )
+
+    def packed(self, count):
+        """Return count random colors as a uint32 array of packed colors."""
+        return PACKED[self.indices(count)]
+
+    def rgb(self, count):
+        """Return count random colors as a (count, 3) uint8 array."""
+        return RGB[self.indices(count)]
+
+
+def random_colors(count, weights=None, seed=None):
+    """Return count random colors as a (count, 3) uint8 array, weighted and
+    seeded as for ColorSampler."""
+    return ColorSampler(weights, seed).rgb(count)
@@ -0,0 +1,238 @@
+"""A cache on disk of rendered text.
+
+Rendering text with SDL_ttf is slow enough to add up when a scene has a lot
+of it, and it is redone on every launch. The cache keeps each rendering's
+raw RGBA pixels in a file named for a hash of everything that went into it,
+including the pygame, SDL and SDL_ttf versions, so an upgrade never reuses
+a stale rendering. A cached rendering is memory-mapped and wrapped in a
+surface with pygame.image.frombuffer, so loading it is a page fault rather
+than a decode.
+
+Loading from the cache costs a hash and a file open, so it only pays for
+renderings slower than that to make, such as large text; simple shapes and
+small text are cheaper to draw again, and render_text renders those
+directly. The cache is limited in size; when it grows past the limit the
+files used least recently are deleted. A cache whose directory can't be
+written renders everything directly. Like assets, there is one of these
+for the whole game; use get_cache()."""
+
+import functools
+import hashlib
+import mmap
+import os
+import struct
+import warnings
+
+import pygame
+
+# Width and height, before the pixels, in each cache file.
+_HEADER = struct.Struct('<II')
+
+# render_text only caches text whose length times its size squared is at
+# least this; below it rendering is faster than a cache hit.
+MIN_CACHED_TEXT = 300000
+
+
+def _versions():
+    """Return the versions of the libraries that render for the cache."""
+    ttf_version = None
+    if hasattr(pygame.font, 'get_sdl_ttf_version'):
+        ttf_version = pygame.font.get_sdl_ttf_version()
+    return (pygame.version.ver, str(pygame.version.SDL), ttf_version)
+
+
+def default_directory():
+    """Return the directory the game's render cache is kept in."""
+    cache_home = os.environ.get('XDG_CACHE_HOME') or os.path.join(
+        os.path.expanduser('~'), '.cache'
+    )
+    return os.path.join(cache_home, 'videogame', 'render')
+
+
+class RenderCache:
+    """Keep rendered surfaces on disk keyed by what they were rendered
+    from."""
+
+    def __init__(self, directory=None, max_bytes=64 * 1024 * 1024):
+        """Initialize a cache in directory, created if needed, holding at
+        most max_bytes of files. If the directory can't be used the cache
+        is disabled and get always renders."""
+        self._directory = directory or default_directory()
+        self._max_bytes = max_bytes
+        self._versions = _versions()
+        self._hits = 0
+        self._misses = 0
+        self._total_bytes = 0
+        self._enabled = True
+        try:
+            os.makedirs(self._directory, exist_ok=True)
+            self._total_bytes = sum(
+                entry.stat().st_size
+                for entry in os.scandir(self._directory)
+                if entry.name.endswith('.rgba')
+            )
+        except OSError as error:
+            self._disable(error)
+
+    def _disable(self, error):
+        """Stop using the cache's directory after error."""
+        warnings.warn(f'Render cache disabled: {error}', RuntimeWarning)
+        self._enabled = False
+
+    @property
+    def enabled(self):
+        """Return whether the cache reads and writes its directory."""
+        return self._enabled
+
+    @property
+    def directory(self):
+        """Return the cache's directory."""
+        return self._directory
+
+    def stats(self):
+        """Return a dictionary of hits, misses and bytes on disk."""
+        return {
+            'hits': self._hits,
+            'misses': self._misses,
+            'bytes': self._total_bytes,
+        }
+
+    def key(self, parameters):
+        """Return the file name for a rendering made from parameters, a
+        tuple of anything with a stable repr."""
+        digest = hashlib.sha256(
+            repr((parameters, self._versions)).encode('utf-8')
+        ).hexdigest()
+        return os.path.join(self._directory, f'{digest}.rgba')
+
+    def load(self, parameters):
+        """Return the cached surface rendered from parameters, or None.
+        The surface's pixels are a copy-on-write mapping of the file."""
+        if not self._enabled:
+            return None
+        path = self.key(parameters)
+        try:
+            with open(path, 'rb') as file_handle:
+                mapping = mmap.mmap(
+                    file_handle.fileno(), 0, access=mmap.ACCESS_COPY
+                )
+        except OSError:
+            return None
+        except ValueError:
+            # An empty file can't be mapped.
+            self._discard(path)
+            return None
+        try:
+            (width, height) = _HEADER.unpack_from(mapping)
+        except struct.error:
+            # Shorter than the header.
+            width = height = -1
+        if len(mapping) != _HEADER.size + width * height * 4:
+            mapping.close()
+            self._discard(path)
+            return None
+        # The surface keeps the mapping alive for as long as it needs it.
+        surface = pygame.image.frombuffer(
+            memoryview(mapping)[_HEADER.size :], (width, height), 'RGBA'
+        )
+        # Mark the file as recently used for eviction.
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return surface
+
+    def store(self, parameters, surface):
+        """Save surface as the rendering made from parameters. A cache that
+        can't write the file is disabled rather than failing."""
+        if not self._enabled:
+            return
+        path = self.key(parameters)
+        pixels = pygame.image.tobytes(surface, 'RGBA')
+        temporary_path = f'{path}.{os.getpid()}.tmp'
+        try:
+            replaced_bytes = os.path.getsize(path)
+        except OSError:
+            replaced_bytes = 0
+        try:
+            with open(temporary_path, 'wb') as file_handle:
+                file_handle.write(_HEADER.pack(*surface.get_size()))
+                file_handle.write(pixels)
+            os.replace(temporary_path, path)
+        except OSError as error:
+            try:
+                os.remove(temporary_path)
+            except OSError:
+                pass
+            self._disable(error)
+            return
+        self._total_bytes += _HEADER.size + len(pixels) - replaced_bytes
+        if self._total_bytes > self._max_bytes:
+            self.evict(self._max_bytes)
+
+    def get(self, parameters, render):
+        """Return the surface rendered from parameters, calling render to
+        make it and caching the result if it isn't cached."""
+        surface = self.load(parameters)
+        if surface is not None:
+            self._hits += 1
+            return surface
+        self._misses += 1
+        surface = render()
+        self.store(parameters, surface)
+        return surface
+
+    def _discard(self, path):
+        """Delete a cache file, which may already be gone or, on some
+        systems, still mapped by a surface."""
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+        except OSError:
+            return
+        self._total_bytes -= size
+
+    def evict(self, max_bytes):
+        """Delete the least recently used files until the cache holds at
+        most max_bytes."""
+        try:
+            entries = sorted(
+                (entry.stat().st_mtime, entry.path)
+                for entry in os.scandir(self._directory)
+                if entry.name.endswith('.rgba')
+            )
+        except OSError:
+            return
+        for (_, path) in entries:
+            if self._total_bytes <= max_bytes:
+                break
+            self._discard(path)
+
+    def clear(self):
+        """Delete every cached rendering."""
+        self.evict(0)
+
+
+@functools.cache
+def get_cache():
+    """Return the game's RenderCache."""
+    return RenderCache()
+
+
+@functools.cache
+def font(path, size):
+    """Return the font at path, or the default font if path is None, in
+    size points, loading it only once."""
+    return pygame.font.Font(path or pygame.font.get_default_font(), size)
+
+
+def render_text(text, size, color, path=None):
+    """Return text antialiased in color with the font at path, or the
+    default font, in size points, from the cache if it was rendered before
+    and is large enough for the cache to be faster; see MIN_CACHED_TEXT."""
+    if len(text) * size * size < MIN_CACHED_TEXT:
+        return font(path, size).render(text, True, color)
+    return get_cache().get(
+        ('text', text, size, tuple(color), path),
+        lambda: font(path, size).render(text, True, color),
+    )
@@ -0,0 +1,138 @@
+"""Resolution independent rendering.
+
+Scenes draw into a surface of a fixed logical size, and once per frame that
+surface is scaled to fit the display, keeping its aspect ratio and leaving
+black bars where it doesn't fill the display. How to scale is worked out
+once per display size and kept: a display the same size as the logical one
+is a plain blit, a whole number scale is a nearest neighbor
+pygame.transform.scale, which is fast and keeps pixel art sharp, and only
+other scales pay for pygame.transform.smoothscale. Scaled copies of assets
+are cached per display size so they are scaled once, not every frame."""
+
+import pygame
+
+from videogame import rgbcolors
+
+
+def fit_rect(logical_size, display_size):
+    """Return the largest rect with the aspect ratio of logical_size that
+    fits centered in display_size, and the scale from one to the other."""
+    scale = min(
+        display_size[0] / logical_size[0], display_size[1] / logical_size[1]
+    )
+    if scale >= 1.0 and scale == int(scale):
+        scale = int(scale)
+    size = (round(logical_size[0] * scale), round(logical_size[1] * scale))
+    rect = pygame.Rect((0, 0), size)
+    rect.center = (display_size[0] // 2, display_size[1] // 2)
+    return (rect, scale)
+
+
+def scale_surface(surface, scale):
+    """Return surface scaled by scale, with nearest neighbor scaling for
+    whole number scales and smooth scaling otherwise."""
+    (width, height) = surface.get_size()
+    size = (max(1, round(width * scale)), max(1, round(height * scale)))
+    if isinstance(scale, int) or surface.get_bitsize() < 24:
+        return pygame.transform.scale(surface, size)
+    return pygame.transform.smoothscale(surface, size)
+
+
+class RenderTarget:
+    """A surface of a logical size scaled to the display every frame."""
+
+    def __init__(self, logical_size, display):
+        """Initialize a render target of logical_size shown on display, the
+        surface returned by pygame.display.set_mode."""
+        self._display = display
+        self._surface = pygame.Surface(logical_size, 0, display)
+        self._display_size = None
+        self._present = None
+        self._fit = None
+        # The part of the display the logical surface is scaled into.
+        self._target = None
+        # Scaled assets by id, for the current display size. The asset is
+        # kept with its copy so its id can't be reused while cached.
+        self._assets = {}
+
+    @property
+    def surface(self):
+        """Return the logical surface scenes draw into."""
+        return self._surface
+
+    @property
+    def logical_size(self):
+        """Return the size scenes draw at."""
+        return self._surface.get_size()
+
+    @property
+    def scale(self):
+        """Return the display pixels per logical pixel."""
+        self._update_fit()
+        return self._fit[1]
+
+    def _update_fit(self):
+        """Work out how to scale to the display if its size has changed,
+        for example after a VIDEORESIZE event."""
+        display_size = self._display.get_size()
+        if display_size == self._display_size:
+            return
+        self._display_size = display_size
+        self._fit = fit_rect(self._surface.get_size(), display_size)
+        self._assets.clear()
+        (rect, scale) = self._fit
+        self._display.fill(rgbcolors.black)
+        self._target = self._display.subsurface(rect)
+        if rect.size == self._surface.get_size():
+            self._present = self._blit
+        elif isinstance(scale, int):
+            self._present = self._scale
+        else:
+            self._present = self._smoothscale
+
+    def _blit(self):
+        """Copy the logical surface to the display unscaled."""
+        self._target.blit(self._surface, (0, 0))
+
+    def _scale(self):
+        """Scale the logical surface to the display by a whole number."""
+        pygame.transform.scale(
+            self._surface, self._target.get_size(), self._target
+        )
+
+    def _smoothscale(self):
+        """Scale the logical surface to the display smoothly."""
+        pygame.transform.smoothscale(
+            self._surface, self._target.get_size(), self._target
+        )
+
+    def present(self):
+        """Scale the logical surface onto the display. Call it before
+        pygame.display.update."""
+        self._update_fit()
+        self._present()
+
+    def to_logical(self, position):
+        """Return the logical position under the display position, for
+        example a mouse position."""
+        self._update_fit()
+        (rect, scale) = self._fit
+        return (
+            int((position[0] - rect.left) / scale),
+            int((position[1] - rect.top) / scale),
+        )
+
+    def scaled_asset(self, surface):
+        """Return surface scaled by the display's scale, scaling it only
+        the first time it is asked for at this display size. Use it for
+        assets drawn straight onto the display at full resolution."""
+        self._update_fit()
+        cached = self._assets.get(id(surface))
+        if cached is None:
+            cached = (surface, scale_surface(surface, self._fit[1]))
+            self._assets[id(surface)] = cached
+        return cached[1]
+
+    def clear_cache(self):
+        """Drop every scaled asset."""
+        self._assets.clear()
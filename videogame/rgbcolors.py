@@ -3,6 +3,7 @@
 
 # pylint: disable=too-many-lines
 
+import collections
 from random import choice
 from pygame import Color
 
@@ -44,11 +45,75 @@ def diff_color(color_a, color_b):
     )
 
 
+def pack(color):
+    """Pack an (r, g, b) or (r, g, b, a) color into a 32 bit integer,
+    0xRRGGBBAA, which is also what pygame.Color(int) takes. Alpha defaults
+    to opaque. Channels may be floats, as pygame.Color allows, and are
+    truncated; a channel outside 0 to 255 raises ValueError. Packed colors
+    are hashable, compare fast and allocate nothing."""
+    (r, g, b) = (int(color[0]), int(color[1]), int(color[2]))
+    alpha = int(color[3]) if len(color) > 3 else 255
+    # Any channel below 0 or above 255 leaves bits set above the low 8.
+    if (r | g | b | alpha) >> 8:
+        raise ValueError(f'color {color!r} has a channel outside 0 to 255')
+    return (r << 24) | (g << 16) | (b << 8) | alpha
+
+
+def unpack(packed):
+    """Return the (r, g, b) tuple of a packed color."""
+    return ((packed >> 24) & 0xFF, (packed >> 16) & 0xFF, (packed >> 8) & 0xFF)
+
+
+def unpack_rgba(packed):
+    """Return the (r, g, b, a) tuple of a packed color."""
+    return unpack(packed) + (packed & 0xFF,)
+
+
+def to_color(color):
+    """Return a new pygame.Color for color, a tuple or a packed color.
+    pygame.Color is mutable, so each call makes a new one; to reuse a color
+    keep it packed, or mapped with a ColorMapper."""
+    if isinstance(color, int):
+        return Color(color)
+    return Color(*color)
+
+
 def tuple_to_color(color_tuple):
     """Given a tuple representing a color, return a Pygame color contructed from that tuple."""
     return Color(*color_tuple)
 
 
+# pylint: disable=too-few-public-methods
+class ColorMapper:
+    """Colors mapped to a surface's pixel format, for Surface.fill and
+    pygame.draw, with each color mapped by Surface.map_rgb only once. A
+    mapped color is an int, so it can be kept and shared, and pygame uses
+    it without converting it again, which saves most on small fills and
+    draws. Map a color once and keep the result; looking it up again for
+    every fill costs more than it saves. The most recently used max_colors
+    colors are kept."""
+
+    def __init__(self, surface, max_colors=1024):
+        """Initialize a mapper for surfaces with the format of surface."""
+        self._map_rgb = surface.map_rgb
+        self._max_colors = max_colors
+        self._mapped = collections.OrderedDict()
+
+    def __call__(self, color):
+        """Return color, a tuple or a packed color, as a mapped integer."""
+        mapped = self._mapped.get(color)
+        if mapped is None:
+            mapped = self._mapped[color] = self._map_rgb(
+                unpack_rgba(color) if isinstance(color, int) else color
+            )
+            if len(self._mapped) > self._max_colors:
+                self._mapped.popitem(last=False)
+        else:
+            self._mapped.move_to_end(color)
+        return mapped
+# pylint: enable=too-few-public-methods
+
+
 def random_color():
     """Return a random color."""
     return choice(all_colors)
@@ -1345,3 +1410,23 @@ all_colors = (
     thistle3,
     thistle4,
 )
+
+
+def _is_color(value):
+    """Return True if value is an (r, g, b) tuple."""
+    return (
+        isinstance(value, tuple)
+        and len(value) == 3
+        and all(isinstance(channel, int) for channel in value)
+    )
+
+
+# Every named color, packed, by name.
+named_colors = {
+    name: pack(value)
+    for (name, value) in list(globals().items())
+    if not name.startswith('_') and _is_color(value)
+}
+
+# all_colors, packed.
+all_packed_colors = tuple(map(pack, all_colors))
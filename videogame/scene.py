@@ -1,8 +1,34 @@
 """Scene objects for making games with PyGame."""
 
+import itertools
+
 import pygame
 from videogame import assets
+from videogame import audio
+from videogame import colorspace
+from videogame import memory
+from videogame import rendercache
 from videogame import rgbcolors
+from videogame import viewport
+
+# Subsystems a scene may need, by name, initialized when it needs them.
+_SUBSYSTEMS = {
+    'font': pygame.font,
+    'joystick': pygame.joystick,
+    'mixer': pygame.mixer,
+}
+
+# Colors in a BlinkingTitle's blink, one for each step of its t.
+BLINK_STEPS = 101
+
+
+def init_subsystems(names):
+    """Initialize the pygame subsystems in names that aren't already."""
+    for name in names:
+        module = _SUBSYSTEMS[name]
+        if not module.get_init():
+            module.init()
+
 
 # If you're interested in using abstract base classes, feel free to rewrite
 # these classes.
@@ -13,12 +39,31 @@ from videogame import rgbcolors
 
 
 class Scene:
-    """Base class for making PyGame Scenes."""
+    """Base class for making PyGame Scenes. A scene draws by queueing blits
+    with queue_blit in draw; direct blits onto the screen are drawn before,
+    and so under, every queued blit."""
+
+    # Names of the pygame subsystems the scene uses, from _SUBSYSTEMS. The
+    # mixer is added for scenes with a soundtrack.
+    subsystems = ()
 
+    # Whether the scene implements snapshot and draw_snapshot and so can be
+    # played by the pipelined game loop.
+    supports_snapshot = False
+
+    # pylint: disable-next=too-many-arguments,too-many-positional-arguments
     def __init__(
-        self, screen, background_color, screen_flags=None, soundtrack=None
+        self,
+        screen,
+        background_color,
+        screen_flags=None,
+        soundtrack=None,
+        background_generator=None,
     ):
-        """Scene initializer"""
+        """Scene initializer. The background is filled with background_color
+        and then, if given, passed to background_generator, a callable such
+        as a functools.partial of a videogame.backgrounds generator."""
+        init_subsystems(self.subsystems)
         self._screen = screen
         if not screen_flags:
             screen_flags = pygame.SCALED
@@ -26,13 +71,76 @@ class Scene:
             self._screen.get_size(), flags=screen_flags
         )
         self._background.fill(background_color)
+        if background_generator:
+            background_generator(self._background)
         self._frame_rate = 60
         self._is_valid = True
         self._soundtrack = soundtrack
+        if self._soundtrack:
+            audio.get_manager().preload_music(self._soundtrack)
         self._render_updates = None
+        # Queued blits keyed by (z order, id of the source surface).
+        self._draw_queue = {}
+
+    def surfaces(self):
+        """Return the surfaces the scene holds, for memory accounting.
+        Subclasses holding more surfaces add theirs."""
+        return [self._background]
+
+    def surface_bytes(self):
+        """Return the bytes of pixel memory held by the scene's surfaces."""
+        return memory.total_bytes(self.surfaces())
+
+    def evict_caches(self):
+        """Drop surfaces the scene can make again when it needs them, to
+        stay within a memory budget. Subclasses with caches override it."""
+
+    def set_background(self, background):
+        """Replace the background with a surface the size of the screen,
+        such as one made by videogame.prerender."""
+        self._background = background
+
+    # pylint: disable-next=too-many-arguments,too-many-positional-arguments
+    def queue_blit(self, source, dest, area=None, special_flags=0, z_order=0):
+        """Queue a blit of source onto the screen at dest. Queued blits are
+        drawn by submit_draw_queue from the lowest z_order to the highest.
+        Blits with the same z_order are grouped by source surface, so they
+        should not depend on being drawn in the order they were queued."""
+        if area is None and not special_flags:
+            entry = (source, dest)
+        else:
+            entry = (source, dest, area, special_flags)
+        key = (z_order, id(source))
+        entries = self._draw_queue.get(key)
+        if entries is None:
+            entries = self._draw_queue[key] = []
+        entries.append(entry)
+
+    def queue_blits(self, source, destinations, z_order=0):
+        """Queue blits of source at each of destinations."""
+        key = (z_order, id(source))
+        entries = self._draw_queue.setdefault(key, [])
+        entries.extend(zip(itertools.repeat(source), destinations))
+
+    def submit_draw_queue(self):
+        """Draw everything queued this frame with a single Surface.blits
+        call and empty the queue."""
+        if self._draw_queue:
+            self._screen.blits(
+                itertools.chain.from_iterable(
+                    self._draw_queue[key] for key in sorted(self._draw_queue)
+                ),
+                doreturn=False,
+            )
+            self._draw_queue.clear()
 
     def draw(self):
-        """Draw the scene."""
+        """Draw the background straight onto the screen. Subclasses call
+        super().draw() first and then queue their blits with queue_blit,
+        which the game loop submits after draw returns. Blits made
+        directly on the screen still work, but land under everything
+        queued; anything that must layer with queued blits has to go
+        through queue_blit."""
         self._screen.blit(self._background, (0, 0))
 
     def process_event(self, event):
@@ -53,25 +161,42 @@ class Scene:
     def render_updates(self):
         """Render all sprite updates."""
 
+    def snapshot(self):
+        """Return a copy of the state draw_snapshot needs. The pipelined
+        game loop takes snapshots on a worker thread right after
+        update_scene, and only of scenes that set supports_snapshot."""
+        return None
+
+    def draw_snapshot(self, state):
+        """Draw the scene from a state returned by snapshot. It runs while
+        the next update is running, so it must read nothing else that
+        update_scene changes."""
+        del state
+        self.draw()
+
     def update_scene(self):
         """Update the scene state."""
 
     def start_scene(self):
-        """Start the scene."""
+        """Start the scene. The soundtrack carries on if the previous scene
+        was already playing it."""
+        audio_manager = audio.get_manager()
         if self._soundtrack:
+            init_subsystems(('mixer',))
             try:
-                pygame.mixer.music.load(self._soundtrack)
-                pygame.mixer.music.set_volume(0.2)
+                audio_manager.play_music(
+                    self._soundtrack, volume=0.2, fade_ms=500
+                )
             except pygame.error as pygame_error:
                 print("\n".join(pygame_error.args))
                 raise SystemExit("broken!!") from pygame_error
-            pygame.mixer.music.play(loops=-1, fade_ms=500)
+        else:
+            audio_manager.stop_released_music(500)
 
     def end_scene(self):
         """End the scene."""
-        if self._soundtrack and pygame.mixer.music.get_busy():
-            pygame.mixer.music.fadeout(500)
-            pygame.mixer.music.stop()
+        if self._soundtrack:
+            audio.get_manager().release_music()
 
     def frame_rate(self):
         """Return the frame rate the scene desires."""
@@ -88,6 +213,98 @@ class PressAnyKeyToExitScene(Scene):
             self._is_valid = False
 
 
+class ScrollingScene(PressAnyKeyToExitScene):
+    """A scene with a world larger than the screen, seen through a camera.
+    Only the objects whose rects are in view are drawn."""
+
+    def __init__(self, screen, background_color, world_size, **kwargs):
+        """Initialize a scene whose world is world_size and whose camera
+        starts at the world's top left corner."""
+        super().__init__(screen, background_color, **kwargs)
+        self._camera = viewport.Camera(
+            self._screen.get_size(), pygame.Rect((0, 0), world_size)
+        )
+        self._world_index = viewport.SpatialHash()
+        # Objects by key as [surface, world rect, z order].
+        self._world_objects = {}
+        self._object_keys = itertools.count()
+
+    @property
+    def camera(self):
+        """Return the scene's camera."""
+        return self._camera
+
+    def add_object(self, surface, position, z_order=0):
+        """Place surface with its top left corner at the world position.
+        Return a key for moving or removing it."""
+        key = next(self._object_keys)
+        rect = surface.get_rect(topleft=position)
+        self._world_objects[key] = [surface, rect, z_order]
+        self._world_index.insert(key, rect)
+        return key
+
+    def move_object(self, key, position):
+        """Move the object with key so its top left corner is at position."""
+        rect = self._world_objects[key][1]
+        rect.topleft = position
+        self._world_index.update(key, rect)
+
+    def remove_object(self, key):
+        """Remove the object with key from the world."""
+        del self._world_objects[key]
+        self._world_index.remove(key)
+
+    def surfaces(self):
+        """Return the background and the world objects' surfaces."""
+        return super().surfaces() + [
+            surface for (surface, _, _) in self._world_objects.values()
+        ]
+
+    def visible_objects(self):
+        """Return the keys of the objects in the camera's view."""
+        return self._world_index.query(self._camera.rect)
+
+    def draw(self):
+        """Queue the background and the objects in view."""
+        super().draw()
+        for key in sorted(self.visible_objects()):
+            (surface, rect, z_order) = self._world_objects[key]
+            self.queue_blit(
+                surface, self._camera.to_screen(rect.topleft), z_order=z_order
+            )
+
+
+class TileMapScene(ScrollingScene):
+    """A scrolling scene whose world is a videogame.tilemap.TileMap. The
+    map is drawn above the background and below the world objects."""
+
+    def __init__(self, screen, tile_map, **kwargs):
+        """Initialize a scene showing tile_map."""
+        super().__init__(
+            screen, rgbcolors.black, tile_map.pixel_size, **kwargs
+        )
+        self._tile_map = tile_map
+
+    def surfaces(self):
+        """Return the scrolling scene's surfaces and the tile map's."""
+        return super().surfaces() + self._tile_map.surfaces()
+
+    def evict_caches(self):
+        """Drop the tile map's rendered chunks."""
+        self._tile_map.clear_cache()
+
+    def draw(self):
+        """Queue the background, the chunks of the map in view and the
+        objects in view."""
+        super().draw()
+        for (chunk, position) in self._tile_map.visible_chunks(
+            self._camera.rect
+        ):
+            self.queue_blit(
+                chunk, self._camera.to_screen(position), z_order=-0.5
+            )
+
+
 class Circle(pygame.Surface):
     """Class representing a circle with a bounding rect."""
 
@@ -101,6 +318,8 @@ class Circle(pygame.Surface):
         self._radius = radius
         self._color = color
         self._name = name
+        # Drawing a circle is cheaper than loading it from the render
+        # cache, so it isn't cached.
         self.fill(rgbcolors.white)
         # draw a circle in the center of the self surface
         pygame.draw.circle(self, self._color, center, self.radius)
@@ -128,6 +347,8 @@ class Circle(pygame.Surface):
 class CircleScene(PressAnyKeyToExitScene):
     """A scene showing a colored circle in the center."""
 
+    supports_snapshot = True
+
     def __init__(self, screen, scene_manager, color):
         super().__init__(
             screen, rgbcolors.black, soundtrack=assets.get('soundtrack')
@@ -143,7 +364,15 @@ class CircleScene(PressAnyKeyToExitScene):
 
     def draw(self):
         super().draw()
-        self._screen.blit(self._circle, self._circle.rect)
+        self.queue_blit(self._circle, self._circle.rect)
+
+    def surfaces(self):
+        """Return the background and the circle."""
+        return super().surfaces() + [self._circle]
+
+    def snapshot(self):
+        """The circle never changes so there is no state to copy."""
+        return ()
 
 
 # Scene 1
@@ -174,9 +403,13 @@ class BlueCircleScene(CircleScene):
 
 
 # Scene 0
+# pylint: disable=too-many-instance-attributes
 class BlinkingTitle(PressAnyKeyToExitScene):
     """A scene with blinking text."""
 
+    subsystems = ('font',)
+    supports_snapshot = True
+
     # pylint: disable-next=too-many-arguments,too-many-positional-arguments
     def __init__(
         self, screen, scene_manager, message, color, size, background_color
@@ -195,37 +428,52 @@ class BlinkingTitle(PressAnyKeyToExitScene):
         self._message = message
         self._t = 0.0
         self._delta_t = 0.01
+        # The blink runs through colors blended in Lab, which stay bright
+        # through the middle where an RGB blend turns muddy.
+        self._blend = [
+            tuple(blend_color)
+            for blend_color in colorspace.gradient(
+                (self._message_complement_color, color), BLINK_STEPS
+            ).tolist()
+        ]
+        # The message is rendered once in white and tinted every frame.
+        self._message_surface = rendercache.render_text(
+            self._message, self._size, rgbcolors.white
+        )
+        self._press_any_key = rendercache.render_text(
+            'Press any key.', 18, rgbcolors.black
+        )
 
     def _interpolate(self):
-        # This can be done with pygame.Color.lerp
         self._t += self._delta_t
         if self._t > 1.0 or self._t < 0.0:
             self._delta_t *= -1
-        c = rgbcolors.sum_color(
-            rgbcolors.mult_color(
-                (1.0 - self._t), self._message_complement_color
-            ),
-            rgbcolors.mult_color(self._t, self._message_color),
-        )
-        return c
+        step = round(min(1.0, max(0.0, self._t)) * (BLINK_STEPS - 1))
+        return self._blend[step]
+
+    def surfaces(self):
+        """Return the background and the rendered text."""
+        return super().surfaces() + [
+            self._message_surface,
+            self._press_any_key,
+        ]
+
+    def snapshot(self):
+        """Advance the blink and return the message's color."""
+        return self._interpolate()
 
     def draw(self):
+        self.draw_snapshot(self._interpolate())
+
+    def draw_snapshot(self, state):
         super().draw()
-        presskey_font = pygame.font.Font(
-            pygame.font.get_default_font(), self._size
-        )
-        presskey = presskey_font.render(
-            self._message, True, self._interpolate()
-        )
+        presskey = self._message_surface.copy()
+        presskey.fill(state, special_flags=pygame.BLEND_RGB_MULT)
         (w, h) = self._screen.get_size()
         presskey_pos = presskey.get_rect(center=(w / 2, h / 2))
-        press_any_key_font = pygame.font.Font(
-            pygame.font.get_default_font(), 18
-        )
-        press_any_key = press_any_key_font.render(
-            'Press any key.', True, rgbcolors.black
+        press_any_key_pos = self._press_any_key.get_rect(
+            center=(w / 2, h - 50)
         )
-        (w, h) = self._screen.get_size()
-        press_any_key_pos = press_any_key.get_rect(center=(w / 2, h - 50))
-        self._screen.blit(presskey, presskey_pos)
-        self._screen.blit(press_any_key, press_any_key_pos)
+        self.queue_blit(presskey, presskey_pos)
+        self.queue_blit(self._press_any_key, press_any_key_pos)
+# pylint: enable=too-many-instance-attributes
@@ -1,17 +1,118 @@
 """A class to manage transitions from one scene to another."""
 
+import traceback
+
+from videogame import memory
+
 
 class SceneManager:
     """A scene manager that works like a list. Poor quality."""
 
     def __init__(self, scenes_list=None):
-        """Initialize a scene manager with a given list of scenes."""
+        """Initialize a scene manager with a given list of scenes. An entry
+        may instead be a function taking no arguments that returns a scene;
+        it is called when the scene is reached, so scenes that are never
+        reached are never built."""
         self._scenes = scenes_list
+        # Scenes built from the functions in the list, by index.
+        self._built = {}
+
+    def _scene(self, index):
+        """Return the scene at index, building it if needed."""
+        entry = self._scenes[index]
+        if not callable(entry):
+            return entry
+        built_scene = self._built.get(index)
+        if built_scene is None:
+            built_scene = self._built[index] = entry()
+        return built_scene
 
     def __iter__(self):
         """Return an iterator to move through the scenes."""
-        return iter(self._scenes)
+        index = 0
+        while index < len(self._scenes):
+            yield self._scene(index)
+            index += 1
 
     def add(self, scene):
         """Add an additional scene to the scene list."""
         self._scenes.append(scene)
+
+    def build_all(self):
+        """Build every scene now rather than when it is reached."""
+        for index in range(len(self._scenes)):
+            self._scene(index)
+
+    def scenes(self):
+        """Return the scenes that have been built."""
+        return [
+            self._built[index] if callable(entry) else entry
+            for (index, entry) in enumerate(self._scenes)
+            if not callable(entry) or index in self._built
+        ]
+
+    def surface_bytes(self):
+        """Return the bytes of pixel memory held by the built scenes'
+        surfaces, counting surfaces shared by scenes once."""
+        return memory.total_bytes(
+            surface
+            for built_scene in self.scenes()
+            for surface in built_scene.surfaces()
+        )
+
+    def memory_report(self):
+        """Return a list of (scene class name, surfaces, bytes) for each
+        built scene."""
+        return [
+            (
+                type(built_scene).__name__,
+                len(built_scene.surfaces()),
+                built_scene.surface_bytes(),
+            )
+            for built_scene in self.scenes()
+        ]
+
+    def enforce_budget(self, budget_bytes, current_scene=None):
+        """Evict the scenes' caches, current_scene's last, until their
+        surfaces fit in budget_bytes or there is nothing left to evict.
+        Return the bytes held afterwards."""
+        held = self.surface_bytes()
+        others = [
+            built_scene
+            for built_scene in self.scenes()
+            if built_scene is not current_scene
+        ]
+        if current_scene is not None:
+            others.append(current_scene)
+        for built_scene in others:
+            if held <= budget_bytes:
+                break
+            built_scene.evict_caches()
+            held = self.surface_bytes()
+        return held
+
+    def rebuild(self, module_names):
+        """Build again the scenes, among those built from functions, whose
+        classes are defined in the modules named in module_names. Return a
+        dictionary mapping each replaced scene to its replacement. A scene
+        that fails to build is reported and kept as it was."""
+        rebuilt = {}
+        for (index, built_scene) in list(self._built.items()):
+            if type(built_scene).__module__ not in module_names:
+                continue
+            try:
+                new_scene = self._scenes[index]()
+            except Exception:  # pylint: disable=broad-exception-caught
+                print(f'Could not rebuild {type(built_scene).__name__}:')
+                traceback.print_exc()
+                continue
+            self._built[index] = new_scene
+            rebuilt[built_scene] = new_scene
+        return rebuilt
+
+    def replace(self, built_scene, replacement):
+        """Put replacement in the place of built_scene, for example to undo
+        a rebuild."""
+        for (index, entry) in self._built.items():
+            if entry is built_scene:
+                self._built[index] = replacement
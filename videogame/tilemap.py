@@ -0,0 +1,169 @@
+"""Large tile maps drawn from pre-rendered chunks.
+
+A map is a 2D NumPy array of tile numbers, stored in the smallest unsigned
+integer type that holds them and optionally memory-mapped from a .npy file,
+so even a 10,000 by 10,000 map needs little memory. The map is drawn in
+square chunks of tiles. A chunk is rendered into a surface the first time it
+comes into view and kept in a least recently used cache of bounded size, so
+scrolling blits a handful of chunk surfaces per frame instead of every tile
+and memory stays bounded however large the map is."""
+
+import collections
+import itertools
+
+import numpy
+import pygame
+
+
+def compact_tiles(tiles, largest=None):
+    """Return tiles as an array of the smallest unsigned integer type that
+    holds largest, by default its own largest tile number. An array already
+    of that type, such as a memory-mapped map saved compacted, is returned
+    as it is."""
+    tiles = numpy.asarray(tiles)
+    if largest is None:
+        largest = int(tiles.max()) if tiles.size else 0
+    for dtype in (numpy.uint8, numpy.uint16, numpy.uint32):
+        if largest <= numpy.iinfo(dtype).max:
+            return tiles.astype(dtype, copy=False)
+    return tiles
+
+
+class TileMap:
+    """A grid of tile numbers indexing into a tileset of equal sized
+    surfaces, drawn in cached chunks."""
+
+    def __init__(self, tiles, tileset, chunk_tiles=16, max_chunks=64):
+        """Initialize a map from tiles, a (rows, columns) array of indices
+        into tileset. Chunks are chunk_tiles on a side and at most
+        max_chunks of them are kept rendered; that must be more than fit on
+        the screen at once or chunks are rendered again every frame. The
+        tiles are compacted with compact_tiles however they were made, to
+        a type that holds every tile in tileset so set_tile can use any."""
+        self._tileset = list(tileset)
+        self._tiles = compact_tiles(tiles, len(self._tileset) - 1)
+        self._tile_size = self._tileset[0].get_size()
+        self._chunk_tiles = chunk_tiles
+        self._max_chunks = max_chunks
+        self._chunks = collections.OrderedDict()
+
+    @classmethod
+    def from_file(cls, path, tileset, **kwargs):
+        """Load a map from a .npy file, memory-mapped copy-on-write so only
+        the rows in use are read, or from a comma separated text file. A
+        .npy file saved with compact_tiles, given the largest tile in the
+        tileset, stays memory-mapped; others are compacted into memory."""
+        if str(path).endswith('.npy'):
+            tiles = numpy.load(path, mmap_mode='c')
+        else:
+            tiles = numpy.loadtxt(path, delimiter=',')
+        return cls(tiles, tileset, **kwargs)
+
+    @property
+    def tiles(self):
+        """Return the array of tile numbers."""
+        return self._tiles
+
+    @property
+    def pixel_size(self):
+        """Return the size of the whole map in pixels."""
+        (rows, columns) = self._tiles.shape
+        return (columns * self._tile_size[0], rows * self._tile_size[1])
+
+    @property
+    def chunk_pixel_size(self):
+        """Return the size of a chunk in pixels."""
+        return (
+            self._chunk_tiles * self._tile_size[0],
+            self._chunk_tiles * self._tile_size[1],
+        )
+
+    @property
+    def cached_chunks(self):
+        """Return how many chunks are rendered and cached."""
+        return len(self._chunks)
+
+    def set_tile(self, row, column, tile):
+        """Change one tile and drop the chunk holding it from the cache."""
+        if not 0 <= tile < len(self._tileset):
+            raise IndexError(f'tile {tile} is not in the tileset')
+        self._tiles[row, column] = tile
+        self._chunks.pop(
+            (column // self._chunk_tiles, row // self._chunk_tiles), None
+        )
+
+    def clear_cache(self):
+        """Drop every rendered chunk."""
+        self._chunks.clear()
+
+    def surfaces(self):
+        """Return the tileset and the cached chunks."""
+        return self._tileset + list(self._chunks.values())
+
+    def _render_chunk(self, chunk):
+        """Render the tiles of chunk, a (column, row) chunk position."""
+        size = self._chunk_tiles
+        (chunk_column, chunk_row) = chunk
+        tiles = self._tiles[
+            chunk_row * size : (chunk_row + 1) * size,
+            chunk_column * size : (chunk_column + 1) * size,
+        ]
+        (tile_width, tile_height) = self._tile_size
+        surface = pygame.Surface(
+            (tiles.shape[1] * tile_width, tiles.shape[0] * tile_height)
+        )
+        surface.blits(
+            (
+                (self._tileset[tile], (column * tile_width, row * tile_height))
+                for ((row, column), tile) in zip(
+                    itertools.product(*map(range, tiles.shape)),
+                    tiles.ravel().tolist(),
+                )
+            ),
+            doreturn=False,
+        )
+        return surface
+
+    def chunk(self, chunk):
+        """Return the surface for chunk, a (column, row) chunk position,
+        rendering it if it isn't cached."""
+        surface = self._chunks.get(chunk)
+        if surface is None:
+            surface = self._render_chunk(chunk)
+            self._chunks[chunk] = surface
+            if len(self._chunks) > self._max_chunks:
+                self._chunks.popitem(last=False)
+        else:
+            self._chunks.move_to_end(chunk)
+        return surface
+
+    def visible_chunks(self, view_rect):
+        """Yield (chunk surface, world position) for the chunks that
+        intersect view_rect, a rect in world pixels."""
+        (chunk_width, chunk_height) = self.chunk_pixel_size
+        view = pygame.Rect(view_rect).clip(
+            pygame.Rect((0, 0), self.pixel_size)
+        )
+        if not view.width or not view.height:
+            return
+        rows = range(
+            view.top // chunk_height, (view.bottom - 1) // chunk_height + 1
+        )
+        columns = range(
+            view.left // chunk_width, (view.right - 1) // chunk_width + 1
+        )
+        for (row, column) in itertools.product(rows, columns):
+            yield (
+                self.chunk((column, row)),
+                (column * chunk_width, row * chunk_height),
+            )
+
+    def draw(self, surface, camera):
+        """Draw the part of the map in the camera's view onto surface."""
+        surface.blits(
+            (
+                (chunk, camera.to_screen(position))
+                for (chunk, position) in self.visible_chunks(camera.rect)
+            ),
+            doreturn=False,
+        )
@@ -0,0 +1,167 @@
+"""Transitions that blend the last frame of one scene into the first frame
+of the next without a GPU.
+
+Both frames are snapshotted once as packed 32 bit pixels when the transition
+starts and everything a transition needs to blend them, such as a dissolve's
+per pixel threshold mask, is computed up front. Each frame is then a few
+vectorized NumPy operations on those buffers followed by a single copy into
+the target surface. The snapshots and the target must be 32 bit surfaces
+with the same pixel format, which is the case for copies of the display."""
+
+import numpy
+import pygame
+
+# Every other byte of a packed pixel, so two channels blend in one multiply.
+_EVEN_BYTES = numpy.uint32(0x00FF00FF)
+# Rows blended at a time; small enough for the buffers to stay in cache.
+_BAND_ROWS = 64
+
+
+def _snapshot(surface):
+    """Return a copy of the surface's packed pixels, indexed [x, y] and laid
+    out in memory the way the surface is so copies back are straight."""
+    pixels = pygame.surfarray.pixels2d(surface)
+    snapshot = numpy.array(pixels, dtype=numpy.uint32, order='F')
+    del pixels
+    return snapshot
+
+
+class Transition:
+    """Base class for transitions; subclasses implement _prepare and
+    _render."""
+
+    def __init__(self, duration_ms=500):
+        """Initialize a transition that lasts duration_ms milliseconds."""
+        self._duration_ms = duration_ms
+        self._elapsed_ms = 0
+        self._outgoing = None
+        self._incoming = None
+        self._frame = None
+        # What _prepare precomputed, and how much of it has been shown.
+        self._prepared = None
+        self._shown = 0
+
+    @property
+    def finished(self):
+        """Return True once the incoming frame is fully shown."""
+        return self._elapsed_ms >= self._duration_ms
+
+    @property
+    def progress(self):
+        """Return how far along the transition is, from 0.0 to 1.0."""
+        return min(self._elapsed_ms / max(self._duration_ms, 1), 1.0)
+
+    def start(self, outgoing, incoming):
+        """Snapshot the outgoing and incoming surfaces and precompute
+        what is needed to blend them."""
+        self._elapsed_ms = 0
+        self._outgoing = _snapshot(outgoing)
+        self._incoming = _snapshot(incoming)
+        self._frame = self._outgoing.copy(order='F')
+        self._shown = 0
+        self._prepared = self._prepare()
+
+    def update(self, delta_time, target):
+        """Advance by delta_time milliseconds and draw the blended frame
+        onto target."""
+        self._elapsed_ms += delta_time
+        self._render(self.progress)
+        pixels = pygame.surfarray.pixels2d(target)
+        pixels[...] = self._frame
+        del pixels
+
+    def _prepare(self):
+        """Return blend data precomputed from self._outgoing and
+        self._incoming; it is kept in self._prepared."""
+        raise NotImplementedError
+
+    def _render(self, progress):
+        """Write the frame for progress into self._frame."""
+        raise NotImplementedError
+
+
+class Fade(Transition):
+    """Crossfade from the outgoing frame to the incoming frame."""
+
+    def _prepare(self):
+        """Split both frames into even and odd bytes once."""
+        channels = [
+            (frame & _EVEN_BYTES, (frame >> 8) & _EVEN_BYTES)
+            for frame in (self._outgoing, self._incoming)
+        ]
+        band = (len(self._frame), _BAND_ROWS)
+        scratch = (
+            numpy.empty(band, dtype=numpy.uint32, order='F'),
+            numpy.empty(band, dtype=numpy.uint32, order='F'),
+        )
+        return (channels, scratch)
+
+    def _render(self, progress):
+        """Blend two channels per multiply with 8 bit fixed point weights,
+        one band of rows at a time so the working set stays in cache."""
+        weight = numpy.uint32(round(progress * 256))
+        inverse = numpy.uint32(256) - weight
+        ((out_even, out_odd), (in_even, in_odd)) = self._prepared[0]
+        height = self._frame.shape[1]
+        for top in range(0, height, _BAND_ROWS):
+            rows = slice(top, top + _BAND_ROWS)
+            size = min(_BAND_ROWS, height - top)
+            (scratch, other) = (
+                buffer[:, :size] for buffer in self._prepared[1]
+            )
+            frame = self._frame[:, rows]
+            numpy.multiply(out_odd[:, rows], inverse, out=frame)
+            numpy.multiply(in_odd[:, rows], weight, out=scratch)
+            frame += scratch
+            frame &= ~_EVEN_BYTES
+            numpy.multiply(out_even[:, rows], inverse, out=scratch)
+            numpy.multiply(in_even[:, rows], weight, out=other)
+            scratch += other
+            scratch >>= 8
+            scratch &= _EVEN_BYTES
+            frame |= scratch
+
+
+class Wipe(Transition):
+    """Slide the incoming frame over the outgoing one from left to right."""
+
+    def _prepare(self):
+        """Nothing to precompute; the mask is a column index."""
+        return None
+
+    def _render(self, progress):
+        """Copy only the columns uncovered since the last frame."""
+        columns = round(progress * len(self._frame))
+        if columns > self._shown:
+            self._frame[self._shown : columns] = self._incoming[
+                self._shown : columns
+            ]
+            self._shown = columns
+
+
+class Dissolve(Transition):
+    """Replace the outgoing frame with the incoming one pixel by pixel in a
+    random order."""
+
+    def __init__(self, duration_ms=500, seed=None):
+        """Initialize a dissolve; seed makes the pixel order repeatable."""
+        super().__init__(duration_ms)
+        self._seed = seed
+
+    def _prepare(self):
+        """Precompute the order pixels switch in as a random permutation."""
+        rng = numpy.random.default_rng(self._seed)
+        return (
+            rng.permutation(self._frame.size),
+            self._incoming.reshape(-1, order='F'),
+            self._frame.reshape(-1, order='F'),
+        )
+
+    def _render(self, progress):
+        """Copy only the pixels that switched since the last frame."""
+        (order, flat_incoming, flat_frame) = self._prepared
+        count = round(progress * len(order))
+        if count > self._shown:
+            switched = order[self._shown : count]
+            flat_frame[switched] = flat_incoming[switched]
+            self._shown = count
@@ -0,0 +1,97 @@
+"""A camera looking at part of a world larger than the window, and a spatial
+index to find the objects it can see.
+
+Objects are indexed by the grid cells their rects overlap, so finding what
+is on screen only touches the cells under the camera and costs time in
+proportion to what is visible, not to how big the world is."""
+
+import pygame
+
+
+class Camera:
+    """The window's view of the world, in world coordinates."""
+
+    def __init__(self, view_size, world_rect):
+        """Initialize a camera showing view_size of world_rect, starting at
+        the world's top left corner."""
+        self._world = pygame.Rect(world_rect)
+        self._view = pygame.Rect(self._world.topleft, view_size)
+
+    @property
+    def rect(self):
+        """Return the part of the world in view."""
+        return self._view
+
+    def move(self, dx, dy):
+        """Move the camera by (dx, dy), staying inside the world."""
+        self._view.move_ip(dx, dy)
+        self._view.clamp_ip(self._world)
+
+    def center_on(self, position):
+        """Center the camera on the world position, staying inside the
+        world."""
+        self._view.center = position
+        self._view.clamp_ip(self._world)
+
+    def to_screen(self, position):
+        """Return where the world position appears in the window."""
+        return (position[0] - self._view.left, position[1] - self._view.top)
+
+    def to_world(self, position):
+        """Return the world position under the window position."""
+        return (position[0] + self._view.left, position[1] + self._view.top)
+
+
+class SpatialHash:
+    """Find objects whose rects intersect a rect using a uniform grid."""
+
+    def __init__(self, cell_size=256):
+        """Initialize an empty index with square cells of cell_size."""
+        self._cell_size = cell_size
+        self._cells = {}
+        self._rects = {}
+
+    def __len__(self):
+        """Return the number of indexed objects."""
+        return len(self._rects)
+
+    def __contains__(self, key):
+        """Return True if key is indexed."""
+        return key in self._rects
+
+    def _cells_under(self, rect):
+        """Yield the grid cells rect overlaps."""
+        size = self._cell_size
+        for column in range(rect.left // size, (rect.right - 1) // size + 1):
+            for row in range(rect.top // size, (rect.bottom - 1) // size + 1):
+                yield (column, row)
+
+    def insert(self, key, rect):
+        """Index key, a hashable object, at rect."""
+        rect = pygame.Rect(rect)
+        self._rects[key] = rect
+        for cell in self._cells_under(rect):
+            self._cells.setdefault(cell, set()).add(key)
+
+    def remove(self, key):
+        """Remove key from the index."""
+        rect = self._rects.pop(key)
+        for cell in self._cells_under(rect):
+            keys = self._cells[cell]
+            keys.discard(key)
+            if not keys:
+                del self._cells[cell]
+
+    def update(self, key, rect):
+        """Move key to rect."""
+        if key in self._rects:
+            self.remove(key)
+        self.insert(key, rect)
+
+    def query(self, rect):
+        """Return the set of keys whose rects intersect rect."""
+        rect = pygame.Rect(rect)
+        found = set()
+        for cell in self._cells_under(rect):
+            found.update(self._cells.get(cell, ()))
+        return {key for key in found if self._rects[key].colliderect(rect)}